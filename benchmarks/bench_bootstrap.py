@@ -0,0 +1,24 @@
+import pytest
+from conftest import cohort
+from stats_bootstrap import bootstrap_params, jackknife_params, permutation_test
+
+
+def bench_bootstrap_1k(benchmark, size):
+    "1000 replicates in-process; compare per-1k cost across sizes and commits."
+    benchmark.extra_info["n_boot"] = 1000
+    res = benchmark.pedantic(bootstrap_params, args=cohort(size), kwargs=dict(n_boot=1000, random_state=1, n_jobs=1),
+                             rounds=3, iterations=1)
+    assert res.completed == 1000
+
+
+def bench_jackknife(benchmark, size):
+    out = benchmark(jackknife_params, *cohort(size))
+    assert len(out) == cohort(size)[0]["Treatment"].nunique()
+
+
+@pytest.mark.parametrize("size", ["small"])
+def bench_permutation_1k(benchmark, size):
+    benchmark.extra_info["n_perm"] = 1000
+    res = benchmark.pedantic(permutation_test, args=cohort(size), kwargs=dict(n_perm=1000, random_state=1, n_jobs=1),
+                             rounds=3, iterations=1)
+    assert (res["n_perm"] > 0).all()
@@ -0,0 +1,16 @@
+from conftest import cohort
+from data_io import read_workbook
+from lifetable_core import analyze_by_treatment
+from synthetic import write_workbook
+
+
+def bench_analyze(benchmark, size):
+    ind, eggs = cohort(size)
+    summary, series = benchmark(analyze_by_treatment, ind, eggs)
+    assert len(summary) == ind["Treatment"].nunique()
+
+
+def bench_read_workbook(benchmark, size, tmp_path):
+    path = write_workbook(tmp_path / f"{size}.xlsx", *cohort(size))
+    ind, eggs = benchmark(read_workbook, path, cache=False)
+    assert len(ind) == len(cohort(size)[0])
@@ -0,0 +1,38 @@
+import pytest
+from conftest import analysed, booted
+from lifetable_core import export_results
+from plot_utils import ZipBundle, export_all_figures, export_figures_zip
+from stats_bootstrap import pairwise_compare_all, summarize_boot
+
+
+def bench_export_results(benchmark, size, tmp_path):
+    summary, series = analysed(size)
+    extra = {"means_se": summarize_boot(booted(size)), "pairwise": pairwise_compare_all(booted(size))}
+    benchmark.pedantic(export_results, args=(str(tmp_path / "results.xlsx"), summary, series),
+                       kwargs=dict(extra_sheets=extra), rounds=3, iterations=1)
+
+
+def bench_export_boot_sheets(benchmark, size, tmp_path):
+    "Raw replicates: one boot_<param> sheet per parameter, constant_memory writer."
+    summary, series = analysed(size)
+    benchmark.pedantic(export_results, args=(str(tmp_path / "results.xlsx"), summary, series),
+                       kwargs=dict(boot=booted(size)), rounds=1, iterations=1)
+
+
+@pytest.mark.parametrize("size", ["small"])
+def bench_export_all_figures(benchmark, size, tmp_path):
+    "Default DPIs and formats, in-process so timings do not depend on the core count."
+    summary, series = analysed(size)
+    paths = benchmark.pedantic(export_all_figures, args=(series, str(tmp_path / "figs")), kwargs=dict(n_jobs=1),
+                               rounds=1, iterations=1)
+    assert len(paths) == (3 + 3 * len(series)) * 2 * 3
+
+
+@pytest.mark.parametrize("size", ["small"])
+def bench_export_figures_zip(benchmark, size, tmp_path):
+    "Same figures rendered straight into a ZIP, no loose folder."
+    summary, series = analysed(size)
+    def run():
+        with ZipBundle(tmp_path / "out.zip") as z: return export_figures_zip(series, z, n_jobs=1)
+    names = benchmark.pedantic(run, rounds=1, iterations=1)
+    assert len(names) == (3 + 3 * len(series)) * 2 * 3
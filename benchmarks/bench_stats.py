@@ -0,0 +1,34 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import booted
+from stats_bootstrap import cld_from_pmatrix, pairwise_compare_all, summarize_boot
+
+
+def bench_pairwise_compare_all(benchmark, size):
+    comp = benchmark(pairwise_compare_all, booted(size), adjust="holm")
+    assert comp["p_adj"].notna().any()
+
+
+def bench_summarize_boot(benchmark, size):
+    out = benchmark(summarize_boot, booted(size))
+    assert "R0_bca_low" in out.columns
+
+
+@pytest.mark.parametrize("pattern", ["banded", "scattered"])
+@pytest.mark.parametrize("k", [10, 60])
+def bench_cld(benchmark, k, pattern):
+    """
+    CLD on a banded significance pattern (neighbours by mean are not different), which
+    needs multi-letter groups, and on 5% scattered significant pairs, which makes
+    insert-and-absorb blow up and exercises the clique-cover path.
+    """
+    trts = [f"T{i:02d}" for i in range(k)]
+    rng = np.random.default_rng(k); means = np.sort(rng.normal(0, 3, k))
+    pairs = list(itertools.combinations(range(k), 2))
+    sig = [abs(means[i] - means[j]) > 2 for i, j in pairs] if pattern == "banded" else rng.random(len(pairs)) < 0.05
+    comp = pd.DataFrame({"A": [trts[i] for i, _ in pairs], "B": [trts[j] for _, j in pairs],
+                         "p_bootstrap": np.where(sig, 0.001, 0.5)})
+    out = benchmark(cld_from_pmatrix, trts, comp)
+    assert out["Letras"].str.len().min() > 0
@@ -0,0 +1,38 @@
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT), str(Path(__file__).resolve().parent)]
+
+from synthetic import make_cohorts  # noqa: E402
+
+# name -> make_cohorts kwargs; "small" mirrors a typical lab workbook, "large" a pooled multi-season dataset
+SIZES = {
+    "small": dict(n_treatments=4, n_individuals=100, max_lifespan=60, egg_density=0.6),
+    "large": dict(n_treatments=10, n_individuals=400, max_lifespan=90, egg_density=0.8),
+}
+
+
+@lru_cache(maxsize=None)
+def cohort(size):
+    return make_cohorts(seed=2024, **SIZES[size])
+
+
+@lru_cache(maxsize=None)
+def analysed(size):
+    from lifetable_core import analyze_by_treatment
+    return analyze_by_treatment(*cohort(size))
+
+
+@lru_cache(maxsize=None)
+def booted(size, n_boot=1000):
+    from stats_bootstrap import bootstrap_params
+    return bootstrap_params(*cohort(size), n_boot=n_boot, random_state=1)
+
+
+@pytest.fixture(params=list(SIZES))
+def size(request):
+    return request.param
@@ -0,0 +1,51 @@
+"""
+Synthetic life-table cohorts for benchmarks: ``make_cohorts`` returns (df_ind, df_eggs)
+in the normalized 'individuals' / 'eggs' layout read by data_io, and ``write_workbook``
+saves them as an input workbook.
+"""
+from __future__ import annotations
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+
+def make_cohorts(n_treatments=4, n_individuals=100, max_lifespan=60, egg_density=0.6,
+                 female_frac=0.5, mean_eggs=5.0, seed=0):
+    """
+    - n_treatments: number of treatments (T01, T02, ...)
+    - n_individuals: individuals per treatment
+    - max_lifespan: upper bound of ImmatureDays + AdultDays
+    - egg_density: probability that a female has an egg record on each adult day
+    Fecundity rises 10% per treatment so comparisons are not all null.
+    """
+    rng = np.random.default_rng(seed)
+    n = n_treatments * n_individuals
+    t = np.repeat(np.arange(n_treatments), n_individuals)
+    trt = np.char.add("T", np.char.zfill(np.char.mod("%d", t + 1), 2)).astype(object)
+    ids = (trt + "-" + np.char.zfill(np.char.mod("%d", np.tile(np.arange(n_individuals), n_treatments)), 4)).astype(object)
+    imm_max = max(2, max_lifespan // 5)
+    imm = rng.integers(1, imm_max, size=n)
+    adult = rng.integers(1, np.maximum(max_lifespan - imm, 2), size=n)
+    fem = rng.random(n) < female_frac
+    df_ind = pd.DataFrame({"Treatment": trt, "ID": ids, "Sex": np.where(fem, "F", "M"),
+                           "ImmatureDays": imm.astype(float), "AdultDays": adult.astype(float)})
+
+    f = np.flatnonzero(fem)
+    who = np.repeat(f, adult[f])                                   # one row per female adult day
+    start = np.repeat(np.cumsum(adult[f]) - adult[f], adult[f])
+    day = np.arange(who.size) - start + 1
+    keep = rng.random(who.size) < egg_density
+    who, day = who[keep], day[keep]
+    eggs = rng.poisson(mean_eggs * (1 + 0.1 * t[who]))
+    df_eggs = pd.DataFrame({"Treatment": trt[who], "FemaleID": ids[who],
+                            "AdultDay": day.astype(float), "Eggs": eggs.astype(float)})
+    return df_ind, df_eggs
+
+
+def write_workbook(path, df_ind, df_eggs):
+    "Save a cohort as an input workbook with 'individuals' and 'eggs' sheets."
+    path = Path(path)
+    with pd.ExcelWriter(path, engine="xlsxwriter") as xw:
+        df_ind.to_excel(xw, sheet_name="individuals", index=False)
+        df_eggs.to_excel(xw, sheet_name="eggs", index=False)
+    return path
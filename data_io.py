@@ -0,0 +1,256 @@
+from __future__ import annotations
+import hashlib
+import os
+from pathlib import Path
+import openpyxl
+import pandas as pd
+import perf
+
+# ------------------------------------------------------------------
+# Robust header normalizer (accept EN/PT and common variants)
+# ------------------------------------------------------------------
+def _keyize(s):
+    return str(s).strip().lower().replace(" ", "").replace("_","")
+
+_EXPECTED = {
+    "individuals": ["Treatment","ID","Sex","ImmatureDays","AdultDays"],
+    "eggs": ["Treatment","FemaleID","AdultDay","Eggs"],
+}
+_HEADER_MAP = {
+    "individuals": {
+        "treatment":"Treatment","tratamento":"Treatment",
+        "id":"ID",
+        "sex":"Sex","sexo":"Sex",
+        "immaturedays":"ImmatureDays","immatureday":"ImmatureDays",
+        "diasimaturos":"ImmatureDays","immature_days":"ImmatureDays","juveniledays":"ImmatureDays",
+        "adultdays":"AdultDays","adultday":"AdultDays",
+        "diasadulto":"AdultDays","adult_days":"AdultDays",
+    },
+    "eggs": {
+        "treatment":"Treatment","tratamento":"Treatment",
+        "femaleid":"FemaleID","femeaid":"FemaleID","idfemea":"FemaleID","id_femea":"FemaleID","idfemale":"FemaleID",
+        "adultday":"AdultDay","diaadulto":"AdultDay","diadulto":"AdultDay","dayadult":"AdultDay",
+        "eggs":"Eggs","ovos":"Eggs",
+    },
+}
+
+def _normalize_headers(df: pd.DataFrame, which: str):
+    cols = {_keyize(c): c for c in df.columns}
+    which = "individuals" if which == "individuals" else "eggs"
+    expected, mapping = _EXPECTED[which], _HEADER_MAP[which]
+
+    norm = {}
+    for k_std, v_std in mapping.items():
+        if k_std in cols:
+            norm[v_std] = df[cols[k_std]]
+    missing = [c for c in expected if c not in norm]
+    if missing:
+        raise ValueError(f"{which.capitalize()} sheet is missing required columns: {missing}")
+    out = pd.DataFrame({c: norm[c] for c in expected})
+
+    if which == "individuals":
+        if "Sex" in out.columns:
+            sex_map = {"f":"F","female":"F","fêmea":"F","femea":"F",
+                       "m":"M","male":"M","macho":"M"}
+            out["Sex"] = out["Sex"].astype(str).str.strip().str.lower().map(sex_map).fillna(out["Sex"])
+        for numcol in ["ImmatureDays","AdultDays"]:
+            out[numcol] = pd.to_numeric(out[numcol], errors="coerce")
+    else:
+        for numcol in ["AdultDay","Eggs"]:
+            out[numcol] = pd.to_numeric(out[numcol], errors="coerce")
+    out["Treatment"] = out["Treatment"].astype(str).str.strip()
+    return out
+
+
+INGEST_VERSION = 1   # bump when the reader or normalization changes, to invalidate cached frames
+CACHE_DIR = Path(os.environ.get("LIFETABLE_CACHE_DIR", Path.home() / ".lifetablestudio" / "cache"))
+INGEST_CACHE_MAX_BYTES = int(float(os.environ.get("LIFETABLE_INGEST_CACHE_MB", "256")) * 2**20)
+_DTYPES = {
+    "individuals": {"Treatment": str, "ImmatureDays": "float64", "AdultDays": "float64"},
+    "eggs": {"Treatment": str, "AdultDay": "float64", "Eggs": "float64"},
+}
+
+def _sheet_frame(ws) -> pd.DataFrame:
+    "Stream a read-only worksheet into a DataFrame (first row = header, blank rows skipped)."
+    ws.reset_dimensions()   # some writers store wrong sheet dimensions; read what is really there
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, ())
+    data = [r for r in rows if any(v is not None for v in r)]
+    cols = [h if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+    width = len(cols)
+    return pd.DataFrame([tuple(r[:width]) + (None,)*(width - len(r)) for r in data], columns=cols)
+
+def _cache_key(path: Path) -> str:
+    st = path.stat(); h = hashlib.blake2b(digest_size=16)
+    h.update(f"{INGEST_VERSION}|{st.st_mtime_ns}|".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""): h.update(chunk)
+    return h.hexdigest()
+
+def _cache_load(stem: Path):
+    for ext, reader in ((".feather", pd.read_feather), (".pkl", pd.read_pickle)):
+        pi, pe = stem.with_name(stem.name + "_ind" + ext), stem.with_name(stem.name + "_eggs" + ext)
+        if pi.exists() and pe.exists():
+            try:
+                hit = reader(pi), reader(pe)
+                for p in (pi, pe): os.utime(p)   # mark as recently used
+                return hit
+            except Exception: pass
+    return None
+
+def _cache_store(stem: Path, df_ind, df_eggs):
+    "Feather when pyarrow can encode both frames (mixed-type ID columns cannot), pickle otherwise; returns the files."
+    stem.parent.mkdir(parents=True, exist_ok=True)
+    feathers = [stem.with_name(stem.name + "_ind.feather"), stem.with_name(stem.name + "_eggs.feather")]
+    try:
+        for df, p in zip((df_ind, df_eggs), feathers): df.to_feather(p)
+        return feathers
+    except Exception:
+        for p in feathers: p.unlink(missing_ok=True)
+        pickles = [stem.with_name(stem.name + "_ind.pkl"), stem.with_name(stem.name + "_eggs.pkl")]
+        for df, p in zip((df_ind, df_eggs), pickles): df.to_pickle(p)
+        return pickles
+
+def _evict(folder, max_bytes, keep=(), pattern="*"):
+    """
+    Delete the least recently used files (by mtime) matching ``pattern`` in folder
+    until the rest fit in max_bytes, never touching ``keep``; files removed
+    meanwhile (e.g. by another process) are skipped.
+    """
+    files = []
+    for f in folder.glob(pattern):
+        try: st = f.stat()
+        except FileNotFoundError: continue
+        files.append((st.st_mtime, st.st_size, f))
+    files.sort(key=lambda t: t[0])
+    total = sum(sz for _, sz, _ in files)
+    for _, sz, f in files:
+        if total <= max_bytes: break
+        if f in keep: continue
+        f.unlink(missing_ok=True); total -= sz
+
+@perf.timed("io.read_workbook")
+def read_workbook(path, cache=True):
+    """
+    Read the 'individuals' and 'eggs' sheets of a workbook and normalize their headers.
+    Both sheets are streamed in one read-only openpyxl pass. With ``cache`` the
+    normalized frames are kept under CACHE_DIR/ingest keyed by file content hash and
+    mtime, so reopening an unchanged workbook skips parsing entirely; least recently
+    used entries are evicted beyond INGEST_CACHE_MAX_BYTES.
+    """
+    path = Path(path)
+    stem = CACHE_DIR / "ingest" / _cache_key(path) if cache else None
+    if stem is not None:
+        with perf.span("io.cache_load"): hit = _cache_load(stem)
+        if hit is not None: return hit
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if "individuals" not in wb.sheetnames or "eggs" not in wb.sheetnames:
+            raise ValueError("Sheets must be 'individuals' and 'eggs'.")
+        df_ind = _normalize_headers(_sheet_frame(wb["individuals"]), "individuals").astype(_DTYPES["individuals"])
+        df_eggs = _normalize_headers(_sheet_frame(wb["eggs"]), "eggs").astype(_DTYPES["eggs"])
+    finally:
+        wb.close()
+    if stem is not None:
+        try: _evict(stem.parent, INGEST_CACHE_MAX_BYTES, keep=_cache_store(stem, df_ind, df_eggs))
+        except Exception: pass
+    return df_ind, df_eggs
+
+# ------------------------------------------------------------------
+# CSV / Parquet inputs
+# ------------------------------------------------------------------
+_EGG_KEYS = {k for k, v in _HEADER_MAP["eggs"].items() if v in ("AdultDay", "Eggs")}
+_TABLE_SUFFIXES = (".csv", ".parquet", ".pq")
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _parquet_folder(path: Path):
+    "A Parquet dataset folder: part files (possibly hive-partitioned) and nothing else."
+    if not path.is_dir(): return False
+    top = [f for f in path.iterdir() if not f.name.startswith((".", "_"))]
+    files_ok = all(f.suffix.lower() in (".parquet", ".pq") for f in top if f.is_file())
+    dirs_ok = all("=" in f.name for f in top if f.is_dir())
+    return bool(top) and files_ok and dirs_ok and any(path.rglob("*.parquet"))
+
+def _is_parquet(path: Path):
+    return path.suffix.lower() in (".parquet", ".pq") or _parquet_folder(path)
+
+def _read_table(path, keys) -> pd.DataFrame:
+    """
+    Read a CSV file or a Parquet file/dataset, keeping only columns whose normalized
+    name is in ``keys``. Parquet needs pyarrow; with pyarrow available both formats
+    come back with pyarrow-backed dtypes (CSV via the pyarrow parser).
+    """
+    path = Path(path)
+    if _is_parquet(path):
+        if not _has_pyarrow(): raise ImportError("Reading Parquet requires pyarrow (pip install pyarrow).")
+        import pyarrow.dataset as pads
+        names = pads.dataset(path, partitioning="hive").schema.names   # partition keys (Treatment=A/) are columns too
+        return pd.read_parquet(path, columns=[c for c in names if _keyize(c) in keys], dtype_backend="pyarrow")
+    names = pd.read_csv(path, nrows=0).columns
+    cols = [c for c in names if _keyize(c) in keys]
+    if _has_pyarrow(): return pd.read_csv(path, usecols=cols, engine="pyarrow", dtype_backend="pyarrow")
+    return pd.read_csv(path, usecols=cols)
+
+def read_table_pair(ind_path, eggs_path):
+    "Individuals and eggs from two CSV or Parquet sources with the workbook sheet columns."
+    df_ind = _normalize_headers(_read_table(ind_path, _HEADER_MAP["individuals"]), "individuals")
+    df_eggs = _normalize_headers(_read_table(eggs_path, _HEADER_MAP["eggs"]), "eggs")
+    return df_ind, df_eggs
+
+def read_long_table(path):
+    """
+    Individuals and eggs from one long-format CSV or Parquet source: one row per egg
+    record with Treatment, ID, Sex, ImmatureDays, AdultDays, AdultDay, Eggs (individual
+    columns repeated; individuals without records have one row with AdultDay/Eggs
+    empty). Adult lifespan must be called AdultDays here, since AdultDay is the egg day.
+    """
+    df = _read_table(path, set(_HEADER_MAP["individuals"]) | _EGG_KEYS)
+    full = _normalize_headers(df[[c for c in df.columns if _keyize(c) not in _EGG_KEYS]], "individuals")
+    df_ind = full.drop_duplicates(["Treatment","ID"]).reset_index(drop=True)
+    eg = df[[c for c in df.columns if _keyize(c) in _EGG_KEYS]].copy()
+    eg["Treatment"] = full["Treatment"].to_numpy(); eg["FemaleID"] = full["ID"].to_numpy()
+    df_eggs = _normalize_headers(eg, "eggs")
+    df_eggs = df_eggs[df_eggs["AdultDay"].notna() | df_eggs["Eggs"].notna()].reset_index(drop=True)
+    return df_ind, df_eggs
+
+def _pair_in(folder: Path):
+    "individuals/eggs sources inside a folder (name.parquet, name.csv or a name/ dataset folder)."
+    def find(name):
+        for cand in (folder / f"{name}.parquet", folder / f"{name}.csv", folder / name):
+            if cand.exists(): return cand
+        return None
+    ind, eggs = find("individuals"), find("eggs")
+    return (ind, eggs) if ind is not None and eggs is not None else None
+
+def is_dataset(path) -> bool:
+    "True for anything load_dataset accepts as a single input."
+    p = Path(path)
+    if p.is_dir(): return _pair_in(p) is not None or _parquet_folder(p)
+    return p.suffix.lower() in (".xlsx", ".xlsm") + _TABLE_SUFFIXES
+
+@perf.timed("io.load_dataset")
+def load_dataset(path):
+    """
+    Normalized (df_ind, df_eggs) from a workbook, a long-format CSV/Parquet file, a
+    folder with individuals/eggs CSV or Parquet sources, or a long-format Parquet dataset.
+    Either table of an individuals/eggs pair also loads the pair from its folder.
+    """
+    p = Path(path)
+    if p.is_dir():
+        pair = _pair_in(p)
+        if pair is not None: return read_table_pair(*pair)
+        if _parquet_folder(p): return read_long_table(p)
+        raise ValueError(f"No individuals/eggs tables found in {p}.")
+    suf = p.suffix.lower()
+    if suf in (".xlsx", ".xlsm"): return read_workbook(p)
+    if suf in _TABLE_SUFFIXES:
+        pair = _pair_in(p.parent) if p.stem.lower() in ("individuals", "eggs") else None
+        if pair is not None and p in pair: return read_table_pair(*pair)
+        return read_long_table(p)
+    raise ValueError(f"Unsupported input: {p.name}")
@@ -44,6 +44,7 @@ STR = {
         "seed": "Seed (optional)",
         "alpha": "α (significance)",
         "param": "Parameter",
+        "p_adjust": "p adjustment",
         "reuse": "Reuse samples (no recompute)",
         "run_boot": "Run bootstrap",
         "update_view": "Update view",
@@ -0,0 +1,144 @@
+"""
+Headless batch runner: ``python -m lifetable DIR_OR_GLOB [...] --out OUT``.
+
+Every workbook (or CSV/Parquet dataset) is read, analysed and exported to ``OUT/<name>/`` without the GUI.
+One JSON object per line is written to stdout for each finished file, followed by
+a summary line; the exit status is 1 when any file failed.
+"""
+from __future__ import annotations
+import argparse
+import glob
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import perf
+from data_io import is_dataset, load_dataset
+from lifetable_core import analyze_by_treatment, export_results
+
+PARAMS = ["R0", "T", "rm", "lambda", "DT"]
+
+
+def expand_inputs(patterns):
+    """
+    A folder that is itself a dataset (individuals/eggs tables, long Parquet dataset) is
+    one input; other folders give their workbooks, CSV and Parquet files. Anything
+    else is treated as a glob (or a plain path). Returns (files, missing): explicit
+    paths (no glob characters) that do not exist are listed in ``missing``.
+    """
+    files = []; missing = []
+    for pat in patterns:
+        p = Path(pat)
+        if p.is_dir() and is_dataset(p):
+            found = [p]
+        elif p.is_dir():
+            found = sorted(f for f in p.iterdir() if f.is_file() and is_dataset(f))
+        elif not glob.has_magic(pat) and not p.exists():
+            missing.append(pat); continue
+        else:
+            found = sorted(Path(f) for f in glob.glob(pat, recursive=True)) or ([p] if p.exists() else [])
+        files += [f for f in found if not f.name.startswith("~$") and f not in files]
+    return files, missing
+
+
+def _out_dirs(files, out_root):
+    "One output folder per input, named after the file stem (suffixed when stems repeat)."
+    seen = {}; dirs = []
+    for f in files:
+        k = seen.get(f.stem, 0); seen[f.stem] = k + 1
+        dirs.append(Path(out_root) / (f.stem if k == 0 else f"{f.stem}_{k+1}"))
+    return dirs
+
+
+def process_file(path, out_dir, n_boot=0, seed=None, boot_jobs=None, adjust=None, figures=False, pdf=False, boot_tol=None, n_perm=0, timings=False,
+                 boot_sheets=False, fig_jobs=None):
+    "Analyse one input (see data_io.load_dataset) and write its exports; returns a JSON-serialisable status record."
+    t0 = time.perf_counter()
+    rec = {"event": "file", "file": str(path), "out_dir": str(out_dir)}
+    if timings: perf.enable(memory=False); perf.reset()
+    try:
+        df_ind, df_eggs = load_dataset(path)
+        summary_df, series_map = analyze_by_treatment(df_ind, df_eggs)
+        out = Path(out_dir); out.mkdir(parents=True, exist_ok=True)
+        extra = {}
+        if n_boot > 0:
+            from stats_bootstrap import bootstrap_params, pairwise_compare_all, summarize_boot
+            boots = bootstrap_params(df_ind, df_eggs, n_boot=n_boot, random_state=seed, n_jobs=boot_jobs, tol=boot_tol)
+            if boots.precision is not None: rec["boot_precision"] = boots.precision
+            extra["means_se"] = summarize_boot(boots)
+            extra["pairwise"] = pairwise_compare_all(boots, PARAMS, adjust=adjust)
+        if n_perm > 0:
+            from stats_bootstrap import permutation_test
+            extra["permutation"] = permutation_test(df_ind, df_eggs, n_perm=n_perm, random_state=seed, n_jobs=boot_jobs, adjust=adjust)
+        outputs = [str(out / "results.xlsx")]
+        export_results(outputs[0], summary_df, series_map, extra_sheets=extra, boot=boots if n_boot > 0 and boot_sheets else None)
+        if figures or pdf:
+            from plot_utils import export_all_figures, make_pdf_report
+            if figures: outputs += export_all_figures(series_map, str(out / "figures"), n_jobs=fig_jobs)
+            if pdf:
+                report = {}
+                if n_boot > 0:
+                    from stats_bootstrap import cld_table
+                    report = dict(pairwise=extra["pairwise"], cld=cld_table(boots, extra["pairwise"], p_col="p_adj" if adjust else "p_bootstrap"))
+                outputs.append(make_pdf_report(summary_df, series_map, str(out / "LifeTable_Report.pdf"), n_jobs=fig_jobs, **report))
+        rec.update(status="ok", treatments=len(series_map), individuals=len(df_ind), eggs=len(df_eggs),
+                   n_boot=n_boot if n_boot <= 0 else boots.n_boot, outputs=outputs)
+    except Exception as e:
+        rec.update(status="error", error=f"{type(e).__name__}: {e}")
+    rec["seconds"] = round(time.perf_counter() - t0, 3)
+    if timings: rec["timings"] = {r.stage: round(r.total_s, 4) for r in perf.report().itertuples(index=False)}
+    return rec
+
+
+def _emit(rec):
+    sys.stdout.write(json.dumps(rec) + "\n"); sys.stdout.flush()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m lifetable", description="Run LifeTableStudio analyses without the GUI.")
+    ap.add_argument("inputs", nargs="+", help="workbooks, CSV/Parquet files or datasets, directories or glob patterns")
+    ap.add_argument("--out", default="lifetable_out", help="output root folder (default: %(default)s)")
+    ap.add_argument("--jobs", type=int, default=1, help="files processed concurrently (default: %(default)s)")
+    ap.add_argument("--boot", type=int, default=0, help="bootstrap replicates per file (0 = skip)")
+    ap.add_argument("--seed", type=int, default=None, help="bootstrap seed")
+    ap.add_argument("--boot-jobs", type=int, default=None, help="worker processes per bootstrap run")
+    ap.add_argument("--boot-tol", type=float, default=None,
+                    help="adaptive bootstrap: stop when CI endpoint MC error <= this many bootstrap SDs (--boot is the cap)")
+    ap.add_argument("--boot-sheets", action="store_true", help="also write the bootstrap replicates (one boot_<param> sheet each)")
+    ap.add_argument("--perm", type=int, default=0, help="permutations per pair for R0/rm permutation tests (0 = skip)")
+    ap.add_argument("--adjust", choices=["holm", "bh"], default=None, help="p-value adjustment for pairwise tables")
+    ap.add_argument("--timings", action="store_true", help="add per-stage timings to each file record")
+    ap.add_argument("--figures", action="store_true", help="also export all figures")
+    ap.add_argument("--pdf", action="store_true", help="also export the PDF report")
+    ap.add_argument("--fig-jobs", type=int, default=None,
+                    help="worker processes per file for figures and PDF pages (default: all cores, or 1 when --jobs > 1)")
+    a = ap.parse_args(argv)
+
+    files, missing = expand_inputs(a.inputs)
+    if not files and not missing:
+        _emit({"event": "summary", "files": 0, "ok": 0, "failed": 0, "error": "no input files matched"})
+        return 2
+    opts = dict(n_boot=a.boot, seed=a.seed, boot_jobs=a.boot_jobs, boot_tol=a.boot_tol, n_perm=a.perm, timings=a.timings, boot_sheets=a.boot_sheets,
+                fig_jobs=a.fig_jobs if a.fig_jobs is not None else (1 if a.jobs > 1 else None), adjust=a.adjust, figures=a.figures, pdf=a.pdf)
+    jobs = list(zip(files, _out_dirs(files, a.out)))
+    failed = len(missing); t0 = time.perf_counter()
+    for m in missing:
+        _emit({"event": "file", "file": m, "status": "error", "error": "FileNotFoundError: no such file or directory"})
+    if a.jobs <= 1:
+        results = (process_file(f, d, **opts) for f, d in jobs)
+        for rec in results:
+            failed += rec["status"] != "ok"; _emit(rec)
+    else:
+        with ProcessPoolExecutor(max_workers=a.jobs) as ex:
+            futs = [ex.submit(process_file, f, d, **opts) for f, d in jobs]
+            for fut in as_completed(futs):
+                rec = fut.result(); failed += rec["status"] != "ok"; _emit(rec)
+    _emit({"event": "summary", "files": len(files) + len(missing), "ok": len(files) + len(missing) - failed, "failed": failed,
+           "seconds": round(time.perf_counter() - t0, 3)})
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,50 @@
 
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List
 import numpy as np
 import pandas as pd
+import perf
 
-@dataclass
 class Series:
-    age: List[int]
-    lx: List[float]
-    mx: List[float]
-    ex: List[float]
+    """
+    Life table columns for one treatment. ``age`` is an int64 array; lx, mx, ex,
+    Lx, Tx and qx are rows of a single C-contiguous float64 buffer of shape
+    (6, n_ages), so attribute access returns views, ``to_frame`` wraps the buffer
+    without copying and ``np.asarray(s)`` / ``memoryview(s.buffer)`` expose it
+    directly. Lx, Tx and qx are derived from lx when not given (qx = 0 where lx = 0).
+    """
+    __slots__ = ("age", "buffer")
+    COLUMNS = ("lx", "mx", "ex", "Lx", "Tx", "qx")
+
+    def __init__(self, age, lx, mx, ex, Lx=None, Tx=None, qx=None):
+        self.age = np.ascontiguousarray(age, dtype=np.int64)
+        lx = np.asarray(lx, dtype=float)
+        if Lx is None: Lx = (lx + np.append(lx[1:], 0.0)) / 2.0
+        if Tx is None: Tx = np.cumsum(Lx[::-1])[::-1]
+        if qx is None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                qx = np.where(lx>0, (lx - np.append(lx[1:], 0.0))/lx, 0.0)
+        self.buffer = np.empty((len(self.COLUMNS), len(self.age)))
+        for row, v in zip(self.buffer, (lx, mx, ex, Lx, Tx, qx)): row[:] = v
+
+    def __len__(self): return len(self.age)
+    def __array__(self, dtype=None, copy=None):
+        return self.buffer.T if dtype is None else self.buffer.T.astype(dtype)
+    def __buffer__(self, flags): return memoryview(self.buffer)
+    def __repr__(self): return f"Series(n_ages={len(self)}, columns={('age',) + self.COLUMNS})"
+    def __getstate__(self): return (self.age, self.buffer)
+    def __setstate__(self, st): self.age, self.buffer = st
+
+    def to_frame(self) -> pd.DataFrame:
+        "DataFrame with an ``age`` column followed by views of the float64 columns."
+        df = pd.DataFrame(self.buffer.T, columns=list(self.COLUMNS), copy=False)
+        df.insert(0, "age", self.age)
+        return df
+
+def _column(i):
+    def get(self): return self.buffer[i]
+    def put(self, v): self.buffer[i] = v
+    return property(get, put)
+for _i, _name in enumerate(Series.COLUMNS): setattr(Series, _name, _column(_i))
 
 def _std_cols(df_ind: pd.DataFrame, df_eggs: pd.DataFrame):
     cols_pt = {"Tratamento":"Treatment","ID":"ID","Sexo":"Sex","DiasImaturos":"ImmatureDays","DiasAdulto":"AdultDays"}
@@ -27,64 +61,147 @@ def _std_cols(df_ind: pd.DataFrame, df_eggs: pd.DataFrame):
     df_eggs["Treatment"] = df_eggs["Treatment"].astype(str)
     return df_ind, df_eggs
 
+def solve_rm(lxmx, tol=1e-14, max_iter=50):
+    """
+    Solve the Euler-Lotka equation sum(lxmx[x] * exp(-r*x)) = 1 for every row of a
+    (B, L) stack of lx*mx vectors (ages 0..L-1); a 1-D vector is treated as one row.
+    The bracket starts at [-1, 1] and widens by 1 on each side up to 10 times; rows
+    without a sign change keep rm = 0. Inside the bracket Newton steps are taken on
+    g(r) = log sum(lxmx * exp(-r*x)), which is convex and close to linear in r (no
+    overflow, no slow crawl from the left); a step leaving the bracket bisects it
+    instead. Each iteration costs one exp per age. Returns (rm, converged, iterations).
+    """
+    lxmx = np.atleast_2d(np.asarray(lxmx, dtype=float)); B, L = lxmx.shape
+    if L == 0: return np.zeros(B), np.zeros(B, dtype=bool), np.zeros(B, dtype=int)
+    x = np.arange(L); pos = lxmx > 0
+    logv = np.where(pos, np.log(np.where(pos, lxmx, 1.0)), -np.inf)
+    def gd(rows, r):
+        a = logv[rows] - r[:, None]*x
+        m = np.max(a, axis=1, keepdims=True); m[~np.isfinite(m)] = 0.0
+        e = np.exp(a - m); S = np.sum(e, axis=1)
+        return m[:, 0] + np.log(S), -np.sum(x*e, axis=1) / S
+    allr = np.arange(B)
+    lo = np.full(B, -1.0); hi = np.full(B, 1.0)
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        gl = gd(allr, lo)[0]; gh = gd(allr, hi)[0]
+        for _ in range(10):
+            m = np.flatnonzero(gl*gh > 0)
+            if not m.size: break
+            lo[m] -= 1.0; hi[m] += 1.0
+            gl[m] = gd(m, lo[m])[0]; gh[m] = gd(m, hi[m])[0]
+        ok = gl*gh <= 0
+        rm = np.where(ok, (lo + hi) / 2.0, 0.0)
+        conv = np.zeros(B, dtype=bool); iters = np.zeros(B, dtype=int)
+        act = np.flatnonzero(ok)
+        for _ in range(max_iter):
+            if not act.size: break
+            r = rm[act]; g, dg = gd(act, r); iters[act] += 1
+            left = g > 0
+            lo[act[left]] = r[left]; hi[act[~left]] = r[~left]
+            nxt = r - g / dg
+            bad = ~np.isfinite(nxt) | (nxt < lo[act]) | (nxt > hi[act])
+            nxt[bad] = (lo[act][bad] + hi[act][bad]) / 2.0
+            rm[act] = nxt
+            eps = tol*np.maximum(1.0, np.abs(r))
+            done = (g == 0) | (np.abs(nxt - r) <= eps) | (hi[act] - lo[act] <= eps)
+            conv[act[done]] = True; act = act[~done]
+    return rm, conv, iters
+
 def _lifetable_for_treatment(ind: pd.DataFrame, eggs: pd.DataFrame):
     ind = ind.copy(); eggs = eggs.copy()
     ind["Lifespan"] = ind["ImmatureDays"].fillna(0).astype(int) + ind["AdultDays"].fillna(0).astype(int)
     n0 = len(ind); max_age = int(ind["Lifespan"].max() if n0>0 else 0)
-    ages = list(range(0, max_age+1))
-    lx = []
-    for x in ages:
-        alive = (ind["Lifespan"] > x).sum()
-        lx.append(alive / n0 if n0>0 else 0.0)
+    ages = np.arange(max_age+1)
+    deaths = np.bincount(np.clip(ind["Lifespan"].to_numpy(), 0, None), minlength=len(ages))[:len(ages)]
+    lx = (n0 - np.cumsum(deaths)) / n0 if n0>0 else np.zeros(len(ages))   # lx[x] = #(Lifespan > x) / n0
     fem0 = (ind["Sex"].astype(str).str.upper().str.startswith("F")).sum()
-    mx = [0.0]*(max_age+1)
+    mx = np.zeros(len(ages))
     if fem0>0 and not eggs.empty:
         avg_imm = int(round(ind["ImmatureDays"].fillna(0).mean()))
         eg = eggs.copy(); eg["AbsAge"] = eg["AdultDay"].fillna(0).astype(int) + avg_imm
         agg = eg.groupby("AbsAge")["Eggs"].sum()
-        for x,v in agg.items():
-            if 0<=x<=max_age: mx[x] = float(v)/max(fem0,1)
-    Lx = [(lx[i] + (lx[i+1] if i+1<len(lx) else 0))/2.0 for i in range(len(lx))]
-    Tx = list(reversed(np.cumsum(list(reversed(Lx)))))
-    ex = [ (Tx[i]/lx[i] if lx[i]>0 else 0.0) for i in range(len(lx)) ]
-    lx_arr = np.array(lx); mx_arr = np.array(mx); x_arr = np.arange(len(lx))
+        keep = (agg.index >= 0) & (agg.index <= max_age)
+        mx[agg.index[keep]] = agg.to_numpy(dtype=float)[keep] / max(fem0,1)
+    Lx = (lx + np.append(lx[1:], 0.0)) / 2.0
+    Tx = np.cumsum(Lx[::-1])[::-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ex = np.where(lx>0, Tx/lx, 0.0)
+    lx_arr = lx; mx_arr = mx; x_arr = ages
     R0 = float(np.sum(lx_arr*mx_arr))
     T = float(np.sum(x_arr*lx_arr*mx_arr)/R0) if R0>0 else 0.0
-    def f(r): return np.sum(lx_arr*mx_arr*np.exp(-r*x_arr)) - 1.0
-    r_low, r_high = -1.0, 1.0; fl, fh = f(r_low), f(r_high); tries=0
-    while fl*fh>0 and tries<10: r_low-=1.0; r_high+=1.0; fl, fh = f(r_low), f(r_high); tries+=1
-    rm = 0.0
-    if fl*fh<=0:
-        for _ in range(60):
-            r_mid=(r_low+r_high)/2.0; fm=f(r_mid)
-            if abs(fm)<1e-8: break
-            if fl*fm<=0: r_high, fh = r_mid, fm
-            else: r_low, fl = r_mid, fm
-        rm = (r_low+r_high)/2.0
+    rm = float(solve_rm(lx_arr*mx_arr)[0][0])
     lam = float(np.exp(rm))
     DT = (np.log(2)/rm) if rm>0 else float("nan")
-    e0 = float(ex[0]) if ex else 0.0
+    e0 = float(ex[0]) if len(ex) else 0.0
     vida_media = float(ind["Lifespan"].mean()) if n0>0 else 0.0
     import pandas as pd
     summary = pd.DataFrame([{
         "Tratamento": ind["Treatment"].iloc[0] if n0>0 else "",
         "R0": R0, "T": T, "rm": rm, "lambda": lam, "DT": DT, "e0": e0, "vida_media": vida_media, "n_individuos": n0
     }])
-    s = Series(age=ages, lx=lx, mx=mx, ex=ex)
+    s = Series(age=ages, lx=lx, mx=mx, ex=ex, Lx=Lx, Tx=Tx)
     return summary, s
 
+@perf.timed("core.analyze")
 def analyze_by_treatment(df_ind: pd.DataFrame, df_eggs: pd.DataFrame):
     df_ind, df_eggs = _std_cols(df_ind, df_eggs)
     treatments = sorted(df_ind["Treatment"].unique())
     import pandas as pd
     all_rows = []; series_map = {}
     for tr in treatments:
-        summ, s = _lifetable_for_treatment(df_ind[df_ind["Treatment"]==tr], df_eggs[df_eggs["Treatment"]==tr])
+        with perf.span("core.lifetable"): summ, s = _lifetable_for_treatment(df_ind[df_ind["Treatment"]==tr], df_eggs[df_eggs["Treatment"]==tr])
         all_rows.append(summ); series_map[tr]=s
     return pd.concat(all_rows, ignore_index=True), series_map
 
-def export_results(path, summary_df, series_map):
-    with pd.ExcelWriter(path, engine="xlsxwriter") as w:
-        summary_df.to_excel(w, sheet_name="summary", index=False)
-        for tr,s in series_map.items():
-            pd.DataFrame({"age": s.age, "lx": s.lx, "mx": s.mx, "ex": s.ex}).to_excel(w, sheet_name=f"series_{tr}"[:31], index=False)
+_XLSX_CHUNK = 4096   # rows converted to Python values at a time
+
+def _xlsx_cells(a):
+    "Column chunk as values for write_row, as pandas.to_excel writes them: missing -> blank, +-inf -> 'inf'/'-inf'."
+    a = np.asarray(a)
+    if a.dtype.kind in "iub": return a.astype(object)
+    out = a.astype(object)
+    if a.dtype.kind == "f":
+        out[np.isnan(a)] = None; inf = np.isinf(a)
+        if inf.any(): out[inf] = np.where(a[inf] > 0, "inf", "-inf")
+        return out
+    miss = pd.isna(out); out[miss] = None
+    for i in np.flatnonzero(~miss):
+        if not isinstance(out[i], (str, int, float, bool)): out[i] = str(out[i])
+    return out
+
+def _xlsx_write(ws, header, columns, n, tick):
+    "Header, then rows 1..n from the column arrays in chunks (constant_memory mode needs rows in order)."
+    ws.write_row(0, 0, [str(h) for h in header])
+    for a in range(0, n, _XLSX_CHUNK):
+        b = min(n, a + _XLSX_CHUNK)
+        for r, row in enumerate(zip(*(_xlsx_cells(c[a:b]) for c in columns)), start=a + 1): ws.write_row(r, 0, row)
+        tick(b - a)
+
+@perf.timed("core.export_results")
+def export_results(path, summary_df, series_map, extra_sheets=None, boot=None, progress=None):
+    """
+    Write summary and per-treatment series sheets; ``extra_sheets`` maps sheet name -> DataFrame.
+    Rows go from the underlying arrays to an xlsxwriter workbook in constant_memory
+    mode, so memory stays flat however many rows are written. ``boot`` (a BootResult)
+    adds a ``boot_<param>`` sheet per parameter with one row per replicate and one
+    column per treatment. ``progress(rows_written, total_rows)`` is called per chunk.
+    """
+    import xlsxwriter
+    frame = lambda df: (list(df.columns), [df[c].to_numpy() for c in df.columns], len(df))
+    sheets = [("summary", *frame(summary_df))]
+    sheets += [(f"series_{tr}", ["age", *s.COLUMNS], [s.age, *s.buffer], len(s.age)) for tr, s in series_map.items()]
+    sheets += [(name, *frame(df)) for name, df in (extra_sheets or {}).items()]
+    if boot is not None and boot.completed:
+        c = boot.completed; reps = np.arange(1, c + 1)
+        sheets += [(f"boot_{p}", ["replicate", *boot.trts], [reps, *boot.data[:, :c, k]], c) for k, p in enumerate(boot.params)]
+    total = sum(n for *_, n in sheets); done = 0
+    def tick(k):
+        nonlocal done
+        done += k
+        if progress is not None: progress(done, total)
+    wb = xlsxwriter.Workbook(str(path), {"constant_memory": True})
+    try:
+        for name, header, columns, n in sheets:
+            with perf.span("core.xlsx_sheet"): _xlsx_write(wb.add_worksheet(name[:31]), header, columns, n, tick)
+    finally:
+        wb.close()
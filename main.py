@@ -1,5 +1,7 @@
-import io
-import base64
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -8,67 +10,26 @@ import matplotlib.pyplot as plt
 import pandas as pd
 
 from i18n import STR
+import perf
+from data_io import load_dataset
 from lifetable_core import analyze_by_treatment, export_results
+from paged_table import PagedTable
 from plot_utils import (
-    fig_lx, fig_mx, fig_ex,
-    export_all_figures, make_pdf_report, zip_outputs
+    fig_lx, fig_mx, fig_ex, ChartPreview,
+    export_figures_zip, make_pdf_report, ZipBundle
 )
 from stats_bootstrap import (
-    bootstrap_params, pairwise_compare, cld_from_pmatrix, summarize_boot
+    bootstrap_params, find_checkpoint, load_boot_cache, pairwise_compare_all, permutation_test, cld_from_pmatrix, summarize_boot
 )
 
-# ------------------------------------------------------------------
-# Robust header normalizer (accept EN/PT and common variants)
-# ------------------------------------------------------------------
-def _normalize_headers(df: pd.DataFrame, which: str):
-    def keyize(s):
-        return str(s).strip().lower().replace(" ", "").replace("_","")
-    cols = {keyize(c): c for c in df.columns}
-
-    if which == "individuals":
-        expected = ["Treatment","ID","Sex","ImmatureDays","AdultDays"]
-        mapping = {
-            "treatment":"Treatment","tratamento":"Treatment",
-            "id":"ID",
-            "sex":"Sex","sexo":"Sex",
-            "immaturedays":"ImmatureDays","immatureday":"ImmatureDays",
-            "diasimaturos":"ImmatureDays","immature_days":"ImmatureDays","juveniledays":"ImmatureDays",
-            "adultdays":"AdultDays","adultday":"AdultDays",
-            "diasadulto":"AdultDays","adult_days":"AdultDays",
-        }
-    else:  # eggs
-        expected = ["Treatment","FemaleID","AdultDay","Eggs"]
-        mapping = {
-            "treatment":"Treatment","tratamento":"Treatment",
-            "femaleid":"FemaleID","femeaid":"FemaleID","idfemea":"FemaleID","id_femea":"FemaleID","idfemale":"FemaleID",
-            "adultday":"AdultDay","diaadulto":"AdultDay","diadulto":"AdultDay","dayadult":"AdultDay",
-            "eggs":"Eggs","ovos":"Eggs",
-        }
-
-    norm = {}
-    for k_std, v_std in mapping.items():
-        if k_std in cols:
-            norm[v_std] = df[cols[k_std]]
-    missing = [c for c in expected if c not in norm]
-    if missing:
-        raise ValueError(f"{which.capitalize()} sheet is missing required columns: {missing}")
-    out = pd.DataFrame({c: norm[c] for c in expected})
-
-    if which == "individuals":
-        if "Sex" in out.columns:
-            sex_map = {"f":"F","female":"F","fêmea":"F","femea":"F",
-                       "m":"M","male":"M","macho":"M"}
-            out["Sex"] = out["Sex"].astype(str).str.strip().str.lower().map(sex_map).fillna(out["Sex"])
-        for numcol in ["ImmatureDays","AdultDays"]:
-            out[numcol] = pd.to_numeric(out[numcol], errors="coerce")
-    else:
-        for numcol in ["AdultDay","Eggs"]:
-            out[numcol] = pd.to_numeric(out[numcol], errors="coerce")
-    out["Treatment"] = out["Treatment"].astype(str).str.strip()
-    return out
-
-
 APP_DIR = Path(__file__).parent
+UI_REFRESH_S = 0.2   # progress is pushed to the client at most this often
+
+# Long jobs (analysis, bootstrap) run here instead of inside the event handler. The
+# executor is shared by every session of the process (flet run --web serves many).
+JOBS = ThreadPoolExecutor(max_workers=max(2, os.cpu_count() or 2), thread_name_prefix="lts-job")
+# Completion handlers (short UI updates) get their own threads so they never queue behind other sessions' jobs.
+UI_DONE = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lts-ui")
 TPL_DIR = APP_DIR / "assets" / "templates"
 ICON_PATH = APP_DIR / "assets" / "icons" / "app_icon.png"
 
@@ -88,12 +49,6 @@ def main(page: ft.Page):
             ctrl.width = w
         return ft.Column([lbl, ctrl], spacing=4)
 
-    def make_table_placeholder():
-        return ft.DataTable(
-            columns=[ft.DataColumn(ft.Text("—"))],
-            rows=[ft.DataRow(cells=[ft.DataCell(ft.Text("—"))])],
-        )
-
     # Bootstrap helpers
     def build_means_se_tables():
         if boot_cache is None:
@@ -107,15 +62,16 @@ def main(page: ft.Page):
 
         params = ["R0", "T", "rm", "lambda", "DT"]
         letters_map = {p: {} for p in params}
+        comp_all, p_col = boot_comparisons()
         for p in params:
-            comp = pairwise_compare(boot_cache, param=p)
+            comp = comp_all[comp_all["param"] == p]
             if comp is not None and len(comp):
-                means = {t: float(boot_cache[t][p].astype(float).mean())
+                means = {t: float(boot_cache[t][p].mean())
                          for t in boot_cache.keys()}
                 trt_order = sorted(means.keys(), key=lambda k: means[k])
                 cld_df = cld_from_pmatrix(
                     trt_order, comp,
-                    alpha=float(alpha_dd.value or "0.05")
+                    alpha=float(alpha_dd.value or "0.05"), p_col=p_col
                 )
                 for _, r in cld_df.iterrows():
                     letters_map[p][r.get("Tratamento", r.get("Treatment", ""))] = r.get("Letras", r.get("Letters", ""))
@@ -132,17 +88,20 @@ def main(page: ft.Page):
                 m = row.get(p + "_mean")
                 s = row.get(p + "_se")
                 letter = row.get(p + "_letter", "")
+                lo, hi = row.get(p + "_bca_low"), row.get(p + "_bca_high")
                 if m is None or s is None or pd.isna(m) or pd.isna(s):
                     pretty = "–"
                 else:
                     pretty = f"{m:.3g} ± {s:.3g}" + (f" {letter}" if letter else "")
+                    if lo is not None and hi is not None and not (pd.isna(lo) or pd.isna(hi)):
+                        pretty += f" [{lo:.3g}, {hi:.3g}]"
                 cells.append(pretty)
 
             rows.append(cells)
 
         formatted_df = _pd.DataFrame(
             rows,
-            columns=["Treatment","R0 (±SE)","T (±SE)","rm (±SE)","λ (±SE)","DT (±SE)"],
+            columns=["Treatment","R0 (±SE) [BCa 95%]","T (±SE) [BCa 95%]","rm (±SE) [BCa 95%]","λ (±SE) [BCa 95%]","DT (±SE) [BCa 95%]"],
         )
         return se_df.copy(), formatted_df
 
@@ -173,58 +132,107 @@ def main(page: ft.Page):
     df_ind = df_eggs = summary_df = None
     series_map = {}
     boot_cache = None
-    cancel_boot = False
+    comp_memo = {}   # all-parameter comparison table for the current boot_cache / adjustment
+    cancel_boot = threading.Event()
+    running = set()   # names of jobs in flight for this session
     console = ft.Text(value=L("console_ready", "Ready."), selectable=True)
 
     def log(msg):
         console.value = str(msg)
         console.update()
 
+    # Performance (Console tab): per-stage timings of the last run
+    set_perf = lambda e: (perf.enable(perf_sw.value, memory=perf_sw.value and mem_sw.value), show_perf())
+    perf_sw = ft.Switch(value=perf.enabled(), on_change=set_perf)
+    mem_sw = ft.Switch(value=False, on_change=set_perf)   # tracemalloc slows every run down: only on request
+    profile_dd = ft.Dropdown(value="off", options=[ft.dropdown.Option(v) for v in ["off", "cprofile", "pyinstrument"]], width=150)
+    perf_text = ft.Text("", selectable=True, font_family="monospace", size=12)
+    profile_text = ft.Text("", selectable=True, font_family="monospace", size=11)
+
+    def profile_kind():
+        return None if (profile_dd.value or "off") == "off" else profile_dd.value
+
+    perf_rows = []   # span records of this session's last run (perf.collect keeps sessions apart)
+
+    def show_perf(prof=None, rows=None):
+        if rows is not None: perf_rows[:] = rows
+        perf_text.value = perf.report_text(perf_rows) if perf.enabled() else "Timing is off (switch on, or set LIFETABLE_PERF=1)."
+        profile_text.value = prof.text if prof is not None else ""
+        try: perf_text.update(); profile_text.update()
+        except Exception: pass
+
+    def submit_job(name, work, on_done, progress=None, show=None, busy=()):
+        """
+        Run ``work()`` on JOBS and return at once. ``progress`` is a dict the worker
+        keeps overwriting with {"i", "n"}; a watcher task reads it every UI_REFRESH_S
+        and calls ``show(i, n)``, so worker callbacks never touch controls. When the
+        job ends ``on_done(result, error)`` runs on UI_DONE; ``busy`` controls are
+        disabled meanwhile. Spans of the job and its handler are collected for this
+        session only.
+        """
+        if name in running:
+            log(f"{name.capitalize()} is already running."); return None
+        running.add(name)
+        for c in busy: c.disabled = True; c.update()
+        rows = []; prof = perf.profile(profile_kind())
+
+        def run():
+            with perf.collect(rows), prof, perf.span(f"job.{name}"):
+                return work()
+        fut = JOBS.submit(run)
+
+        async def watch():
+            last = None
+            while not fut.done():
+                cur = (progress["i"], progress["n"]) if progress else None
+                if show is not None and cur is not None and cur != last:
+                    show(*cur); last = cur
+                await asyncio.sleep(UI_REFRESH_S)
+            err = fut.exception()
+            def finish():
+                try:
+                    with perf.collect(rows), perf.span(f"ui.{name}"): on_done(None if err else fut.result(), err)
+                finally:
+                    running.discard(name)
+                    for c in busy: c.disabled = False; c.update()
+                    show_perf(prof if prof.kind else None, rows)
+            await asyncio.get_running_loop().run_in_executor(UI_DONE, finish)
+
+        page.run_task(watch)
+        return fut
+
     # Data & Results
-    data_preview = ft.DataTable(columns=[ft.DataColumn(ft.Text("col"))], rows=[])
+    data_preview = PagedTable(page_size=50)
+    data_sheet_dd = ft.Dropdown(value="individuals", options=[ft.dropdown.Option("individuals"), ft.dropdown.Option("eggs")],
+                                width=160, on_change=lambda e: show_data_sheet())
 
-    result_cols = ["Tratamento","R0","T","rm","lambda","DT","e0","vida_media","n_individuos"]
-    results_table = ft.DataTable(columns=[ft.DataColumn(ft.Text(c)) for c in result_cols], rows=[])
+    def show_data_sheet():
+        df_to_table(df_eggs if data_sheet_dd.value == "eggs" else df_ind, data_preview)
 
-    def update_results_headers():
-        headers = ["Treatment","R0","T","rm","lambda","DT","e0","mean_lifespan","n_individuals"]
-        if hasattr(results_table, "columns") and len(results_table.columns) == len(headers):
-            for i, col in enumerate(results_table.columns):
-                try:
-                    col.label.value = headers[i]
-                except Exception:
-                    col.label = ft.Text(headers[i])
-            results_table.update()
+    result_cols = ["Tratamento","R0","T","rm","lambda","DT","e0","vida_media","n_individuos"]
+    result_headers = ["Treatment","R0","T","rm","lambda","DT","e0","mean_lifespan","n_individuals"]
+    results_table = PagedTable(page_size=50)
 
     def load_excel(path: str):
         nonlocal df_ind, df_eggs
+        rows = []
         try:
-            xl = pd.ExcelFile(path)
-            sheet_ind = "individuals" if "individuals" in xl.sheet_names else None
-            sheet_eggs = "eggs" if "eggs" in xl.sheet_names else None
-            if not sheet_ind or not sheet_eggs:
-                raise ValueError("Sheets must be 'individuals' and 'eggs'.")
-
-            df_ind = pd.read_excel(path, sheet_name=sheet_ind)
-            df_ind = _normalize_headers(df_ind, 'individuals')
-            df_eggs = pd.read_excel(path, sheet_name=sheet_eggs)
-            df_eggs = _normalize_headers(df_eggs, 'eggs')
-
-            data_preview.columns = [ft.DataColumn(ft.Text(c)) for c in df_ind.columns]
-            data_preview.rows = [
-                ft.DataRow(cells=[ft.DataCell(ft.Text(str(r[c]))) for c in df_ind.columns])
-                for _, r in df_ind.head(10).iterrows()
-            ]
-            data_preview.update()
+            with perf.collect(rows), perf.span("job.load"): df_ind, df_eggs = load_dataset(path)
+
+            show_data_sheet()
             log(f"Loaded: {len(df_ind)} individuals, {len(df_eggs)} eggs.")
         except Exception as e:
             log(f"Load error: {e}")
+        show_perf(rows=rows)
 
     # Charts
     chart_img = ft.Image(width=980, height=560, fit=ft.ImageFit.CONTAIN, visible=False)
+    previews = ChartPreview()
+    live_preview = lambda e=None: render_chart_preview() if chart_img.visible else None
 
-    metric_dd = ft.Dropdown(value="lx", options=[ft.dropdown.Option("lx"), ft.dropdown.Option("mx"), ft.dropdown.Option("ex")], width=160)
-    overlay_switch = ft.Switch(value=True)
+    metric_dd = ft.Dropdown(value="lx", options=[ft.dropdown.Option("lx"), ft.dropdown.Option("mx"), ft.dropdown.Option("ex")], width=160,
+                            on_change=live_preview)
+    overlay_switch = ft.Switch(value=True, on_change=live_preview)
     dpi_dd = ft.Dropdown(value="600", options=[ft.dropdown.Option("300"), ft.dropdown.Option("600")], width=120)
     fmt_dd = ft.Dropdown(value="png", options=[ft.dropdown.Option("png"), ft.dropdown.Option("jpg"), ft.dropdown.Option("eps")], width=130)
     width_in = ft.TextField(value="8", width=110, content_padding=ft.padding.symmetric(horizontal=8, vertical=6))
@@ -237,7 +245,7 @@ def main(page: ft.Page):
         tr_checks.controls.clear()
         if series_map:
             for tr in series_map.keys():
-                tr_checks.controls.append(ft.Checkbox(label=str(tr), value=True))
+                tr_checks.controls.append(ft.Checkbox(label=str(tr), value=True, on_change=live_preview))
         tr_checks.update()
 
     def selected_treatments():
@@ -270,17 +278,10 @@ def main(page: ft.Page):
             "lx_title": "Survivorship (lx)", "mx_title": "Fecundity (mx)", "ex_title": "Life expectancy (ex)",
             "lx_overlay_title": "Survivorship", "mx_overlay_title": "Fecundity", "ex_overlay_title": "Life expectancy",
         }
-        metric = metric_dd.value; overlay = overlay_switch.value
+        metric = metric_dd.value or "lx"; overlay = overlay_switch.value
         _resize_preview(); fig_size = current_figsize()
 
-        if metric == "lx": fig = fig_lx(series_map, sels, overlay, labels, fig_size)
-        elif metric == "mx": fig = fig_mx(series_map, sels, overlay, labels, fig_size)
-        else: fig = fig_ex(series_map, sels, overlay, labels, fig_size)
-
-        buf = io.BytesIO()
-        fig.savefig(buf, format="png", dpi=160, bbox_inches="tight")
-        plt.close(fig); buf.seek(0)
-        chart_img.src_base64 = base64.b64encode(buf.read()).decode("ascii")
+        chart_img.src_base64 = previews.render(series_map, metric, sels, overlay, labels, fig_size)
         chart_img.visible = True; chart_img.update()
 
     def save_current_chart(e=None):
@@ -310,47 +311,66 @@ def main(page: ft.Page):
 
     # Analysis
     def run_analysis():
-        nonlocal summary_df, series_map, boot_cache
-        boot_cache = None
+        nonlocal boot_cache
         if df_ind is None or df_eggs is None:
             log("No data loaded."); return
-        try:
-            summary_df, series_map = analyze_by_treatment(df_ind, df_eggs)
-            results_table.columns = [ft.DataColumn(ft.Text(c)) for c in result_cols]
-            rows = []
-            for _, row in summary_df.iterrows():
-                cells = []
-                for c in result_cols:
-                    v = row[c]
-                    cells.append(ft.DataCell(ft.Text(f"{v:.6g}" if isinstance(v,(float,int)) else str(v))))
-                rows.append(ft.DataRow(cells=cells))
-            results_table.rows = rows; update_results_headers(); results_table.update()
+        boot_cache = None
+        ind, eggs = df_ind, df_eggs
+        n_boot, seed = boot_settings(); reuse = reuse_sw.value
+
+        def work():
+            res = analyze_by_treatment(ind, eggs)
+            return res, (load_boot_cache(ind, eggs, n_boot, seed) if reuse else None), find_checkpoint(ind, eggs, n_boot, seed)
+
+        def done(res, err):
+            nonlocal summary_df, series_map, boot_cache
+            if err is not None:
+                log(f"Analysis error: {err}"); return
+            (summary_df, series_map), cached, ckpt = res
+            previews.invalidate()
+            df_to_table(summary_df[result_cols].set_axis(result_headers, axis=1), results_table)
             refresh_treatments_checks(); log("Done.")
-        except Exception as e:
-            log(f"Analysis error: {e}")
+            if cached is not None:
+                boot_cache = cached; refresh_boot_views()
+                log(f"Loaded cached bootstrap (n={cached.n_boot}, seed={cached.seed}).")
+            show_resume(ckpt)
+
+        log("Running analysis ...")
+        submit_job("analysis", work, done, busy=(btn_run,))
 
     # Exports
+    def results_xlsx_frames():
+        "Finished inputs of results.xlsx; built on the UI side, since build_means_se_tables shares comp_memo with the views."
+        export_df = summary_df.rename(columns={"Tratamento":"Treatment","vida_media":"mean_lifespan","n_individuos":"n_individuals"})
+        se_df, fmt_df = build_means_se_tables()
+        extra = {name: df for name, df in (("means_se", se_df), ("formatted_table", fmt_df)) if df is not None}
+        boot = boot_cache if boot_xlsx_sw.value and boot_cache is not None else None
+        return export_df, series_map, extra, boot
+
+    def write_results_xlsx(path, frames, progress=None):
+        "results.xlsx from results_xlsx_frames() via export_results (constant memory); safe on a JOBS thread."
+        export_df, smap, extra, boot = frames
+        export_results(path, export_df, smap, extra_sheets=extra, boot=boot, progress=progress)
+        return path
+
     def export_output():
         if summary_df is None: log("No data loaded."); return
-        import pandas as _pd
+
+        def show(i, n):
+            frac = max(0.0, min(1.0, float(i) / float(n or 1)))
+            prog_bar.value = frac; prog_bar.update()
+            prog_label.value = f"Writing Excel {int(100*frac)}%"; prog_label.update()
+
+        def done(res, err):
+            if err is not None: log(f"Export error: {err}")
+            else: show(1, 1); log(f"Exported. ({res})")
 
         def on_pick(res: ft.FilePickerResultEvent):
             if not res or not res.path: return
             outdir = Path(res.path); outdir.mkdir(parents=True, exist_ok=True)
-            out = outdir / "results.xlsx"
-            with _pd.ExcelWriter(out, engine="xlsxwriter") as w:
-                export_df = summary_df.rename(columns={
-                    "Tratamento":"Treatment",
-                    "vida_media":"mean_lifespan",
-                    "n_individuos":"n_individuals"
-                })
-                export_df.to_excel(w, sheet_name="summary", index=False)
-                for tr, s in series_map.items():
-                    _pd.DataFrame({"age": s.age, "lx": s.lx, "mx": s.mx, "ex": s.ex}).to_excel(w, sheet_name=f"series_{tr}"[:31], index=False)
-                se_df, fmt_df = build_means_se_tables()
-                if se_df is not None: se_df.to_excel(w, sheet_name="means_se", index=False)
-                if fmt_df is not None: fmt_df.to_excel(w, sheet_name="formatted_table", index=False)
-            log(f"Exported. ({out})")
+            prog = {"i": 0, "n": 1}; show(0, 1); frames = results_xlsx_frames()
+            submit_job("export", lambda: write_results_xlsx(outdir / "results.xlsx", frames, progress=lambda i, n: prog.update(i=i, n=n)),
+                       done, progress=prog, show=show, busy=(btn_export,))
 
         fp = ft.FilePicker(on_result=on_pick); page.overlay.append(fp); page.update()
         fp.get_directory_path(dialog_title="Choose a folder to save 'results.xlsx'")
@@ -384,18 +404,19 @@ def main(page: ft.Page):
         fig_size = current_figsize()
         def on_pick(res: ft.FilePickerResultEvent):
             if not res or not res.path: return
-            target = Path(res.path); target.mkdir(parents=True, exist_ok=True)
-            figs_dir = target / "figures"
-            files = export_all_figures(series_map, str(figs_dir), dpis=(300,600), formats=("png","jpg","eps"), labels=labels, fig_size=fig_size)
-            out_xlsx = target / "results.xlsx"
-            export_df = summary_df.rename(columns={"Tratamento":"Treatment","vida_media":"mean_lifespan","n_individuos":"n_individuals"})
-            with pd.ExcelWriter(out_xlsx, engine="xlsxwriter") as w: export_df.to_excel(w, sheet_name="summary", index=False)
-            files.append(str(out_xlsx))
-            pdf_path = target / "LifeTable_Report.pdf"
-            pdf = make_pdf_report(summary_df, series_map, str(pdf_path), labels=labels, fig_size=fig_size)
-            files.append(pdf)
-            zip_path = target / "LifeTable_Outputs.zip"; zip_outputs(str(zip_path), files)
-            log(f"All exports generated. Folder: {target} | ZIP: {zip_path}")
+            rows = []
+            with perf.collect(rows):
+                target = Path(res.path); target.mkdir(parents=True, exist_ok=True)
+                zip_path = target / "LifeTable_Outputs.zip"
+                # figures go straight from memory into the ZIP; the loose figures/ folder is optional
+                with ZipBundle(zip_path, loose_dir=target / "figures" if loose_figs_sw.value else None) as z:
+                    export_figures_zip(series_map, z, dpis=(300,600), formats=("png","jpg","eps"), labels=labels, fig_size=fig_size)
+                    z.add_file(write_results_xlsx(target / "results.xlsx", results_xlsx_frames()))
+                    pdf_path = target / "LifeTable_Report.pdf"
+                    comp = boot_comparisons()[0] if boot_cache is not None else None
+                    z.add_file(make_pdf_report(summary_df, series_map, str(pdf_path), labels=labels, fig_size=fig_size,
+                                               pairwise=comp, cld=build_means_se_tables()[1]))
+            log(f"All exports generated. Folder: {target} | ZIP: {zip_path} ({len(z.names)} files)"); show_perf(rows=rows)
         fp = ft.FilePicker(on_result=on_pick); page.overlay.append(fp); page.update()
         fp.get_directory_path(dialog_title="Choose a folder to EXPORT (figures + PDF + ZIP)")
 
@@ -434,9 +455,11 @@ def main(page: ft.Page):
     sidebar_title = ft.Text("Project", weight=ft.FontWeight.BOLD, size=16)
     btn_tpl_en = ft.ElevatedButton(L("btn_tpl_en","Download template"), on_click=lambda e: download_template_lang("en"))
     btn_show_instr = ft.ElevatedButton("Spreadsheet instructions", on_click=show_instructions)
-    btn_open_excel = ft.ElevatedButton("Open filled workbook...", on_click=lambda e: fp_open.pick_files(allow_multiple=False, file_type=ft.FilePickerFileType.CUSTOM, allowed_extensions=["xlsx"]))
+    btn_open_excel = ft.ElevatedButton("Open filled workbook...", on_click=lambda e: fp_open.pick_files(allow_multiple=False, file_type=ft.FilePickerFileType.CUSTOM, allowed_extensions=["xlsx", "csv", "parquet"]))
+    btn_open_folder = ft.OutlinedButton("Open data folder...", on_click=lambda e: fp_open.get_directory_path(dialog_title="Folder with individuals/eggs tables or a Parquet dataset"))
     btn_run = ft.ElevatedButton("Run analysis", on_click=lambda e: run_analysis())
     btn_export = ft.ElevatedButton("Export results (Excel)", on_click=lambda e: export_output())
+    boot_xlsx_sw = ft.Switch(label="Include bootstrap replicates", value=False)
 
     cite_style = ft.Dropdown(value="APA", options=[ft.dropdown.Option("APA"), ft.dropdown.Option("ABNT")], width=120)
     btn_cite = ft.ElevatedButton(
@@ -447,7 +470,7 @@ def main(page: ft.Page):
 )
 
     sidebar = ft.Container(
-        content=ft.Column([sidebar_title, btn_tpl_en, btn_show_instr, btn_open_excel, btn_run, btn_export, ft.Row([ft.Text("Style:"), cite_style, btn_cite], spacing=8)], spacing=12),
+        content=ft.Column([sidebar_title, btn_tpl_en, btn_show_instr, btn_open_excel, btn_open_folder, btn_run, btn_export, boot_xlsx_sw, ft.Row([ft.Text("Style:"), cite_style, btn_cite], spacing=8)], spacing=12),
         width=300, padding=16,
     )
 
@@ -469,13 +492,14 @@ def main(page: ft.Page):
     btn_save_chart = ft.ElevatedButton("Save current chart...", on_click=save_current_chart)
     btn_export_all = ft.ElevatedButton("Export EVERYTHING (figures + PDF + ZIP)...", on_click=export_all)
     btn_export_fmt = ft.ElevatedButton("Export formatted table (Excel)", on_click=export_formatted_table)
+    loose_figs_sw = ft.Switch(label="Also write figures/ folder", value=True)
 
     charts_content = ft.Column(
         [
             charts_row,
             ft.Text("Treatments:"),
             ft.Container(content=tr_checks, height=140, width=420, bgcolor=ft.colors.with_opacity(0.03, ft.colors.BLUE_GREY_50), padding=8, border=ft.border.all(1, ft.colors.GREY_400)),
-            ft.Row([btn_preview, btn_save_chart, btn_export_all, btn_export_fmt], spacing=10),
+            ft.Row([btn_preview, btn_save_chart, btn_export_all, loose_figs_sw, btn_export_fmt], spacing=10),
             ft.Divider(),
             chart_img,
         ],
@@ -487,7 +511,9 @@ def main(page: ft.Page):
     seed_tf = ft.TextField(value="2024", width=150, content_padding=ft.padding.symmetric(horizontal=8, vertical=6))
     alpha_dd = ft.Dropdown(value="0.05", options=[ft.dropdown.Option("0.01"), ft.dropdown.Option("0.05"), ft.dropdown.Option("0.10")], width=140)
     param_dd = ft.Dropdown(value="R0", options=[ft.dropdown.Option(p) for p in ["R0", "T", "rm", "lambda", "DT"]], width=120, on_change=lambda e: refresh_boot_views())
+    adjust_dd = ft.Dropdown(value="none", options=[ft.dropdown.Option("none"), ft.dropdown.Option("holm"), ft.dropdown.Option("bh")], width=120, on_change=lambda e: refresh_boot_views())
     reuse_sw = ft.Switch(value=True, on_change=lambda e: update_boot_note())
+    tol_dd = ft.Dropdown(value="off", options=[ft.dropdown.Option(v) for v in ["off", "0.2", "0.1", "0.05"]], width=120)
 
     prog_bar = ft.ProgressBar(value=0, width=420)
     prog_label = ft.Text("Progress")
@@ -497,35 +523,39 @@ def main(page: ft.Page):
     boot_note = ft.Text("", selectable=True, size=12)
 
     def set_cancel():
-        nonlocal cancel_boot
-        cancel_boot = True
+        cancel_boot.set()
 
     def update_boot_note():
         txt = (f"Displayed results use n_boot={boot_iters.value}, seed={seed_tf.value or 'None'}, cache={'ON' if reuse_sw.value else 'OFF'}. "
-               f"Tip: set a seed for reproducibility and keep 'Reuse samples' ON to switch parameters without recomputing.")
+               f"Tip: set a seed for reproducibility and keep 'Reuse samples' ON to switch parameters without recomputing; "
+               f"seeded runs are also cached on disk and reloaded when the same data is analysed again.")
         boot_note.value = txt; boot_note.update()
 
-    pairs_table = make_table_placeholder()
-    letters_table = make_table_placeholder()
-    means_se_table = make_table_placeholder()
+    pairs_table = PagedTable()
+    letters_table = PagedTable()
+    means_se_table = PagedTable()
+
+    @perf.timed("ui.table")
+    def df_to_table(df: pd.DataFrame, tbl: PagedTable, keep_page=False):
+        "Show ``df`` in a paged table; only the visible page is formatted and sent."
+        tbl.set_frame(df, keep_page=keep_page)
 
-    def df_to_table(df: pd.DataFrame, tbl: ft.DataTable):
-        if df is None or getattr(df, 'empty', True):
-            tbl.columns = [ft.DataColumn(ft.Text("—"))]; tbl.rows = [ft.DataRow(cells=[ft.DataCell(ft.Text("—"))])]; tbl.update(); return
-        tbl.columns = [ft.DataColumn(ft.Text(str(c))) for c in df.columns]
-        rows = []; 
-        for _, r in df.iterrows():
-            cells = [ft.DataCell(ft.Text(str(r[c]))) for c in df.columns]; rows.append(ft.DataRow(cells=cells))
-        tbl.rows = rows; tbl.update()
+    def boot_comparisons():
+        "Pairwise comparisons of every parameter, computed once per bootstrap run and p adjustment."
+        adjust = None if (adjust_dd.value or "none") == "none" else adjust_dd.value
+        if comp_memo.get("src") is not boot_cache or comp_memo.get("adjust") != adjust:
+            comp_memo.update(src=boot_cache, adjust=adjust, comp=pairwise_compare_all(boot_cache, adjust=adjust))
+        return comp_memo["comp"], ("p_adj" if adjust else "p_bootstrap")
 
     def refresh_boot_views():
         try:
             if boot_cache is not None:
-                comp = pairwise_compare(boot_cache, param=(param_dd.value or "R0")); df_to_table(comp, pairs_table)
+                comp_all, p_col = boot_comparisons()
+                comp = comp_all[comp_all["param"] == (param_dd.value or "R0")]; df_to_table(comp, pairs_table)
                 if comp is not None and len(comp):
-                    means = {t: float(boot_cache[t][(param_dd.value or "R0")].astype(float).mean()) for t in boot_cache.keys()}
+                    means = {t: float(boot_cache[t][(param_dd.value or "R0")].mean()) for t in boot_cache.keys()}
                     trt_order = sorted(means.keys(), key=lambda k: means[k])
-                    cld = cld_from_pmatrix(trt_order, comp, alpha=float(alpha_dd.value or "0.05"))
+                    cld = cld_from_pmatrix(trt_order, comp, alpha=float(alpha_dd.value or "0.05"), p_col=p_col)
                     cld = cld.rename(columns={"Tratamento": "Treatment", "Letras": "Letters"}); df_to_table(cld, letters_table)
                 else:
                     df_to_table(pd.DataFrame(), letters_table)
@@ -535,40 +565,102 @@ def main(page: ft.Page):
         except Exception:
             pass
 
-    def run_bootstrap(e=None):
-        nonlocal boot_cache, cancel_boot
-        if df_ind is None or df_eggs is None: log("No data loaded."); return
-        if reuse_sw.value and boot_cache is not None:
-            refresh_boot_views(); return
-
+    def boot_settings():
         n_boot = int(boot_iters.value or "1000")
         seed = None
         try: seed = int(seed_tf.value) if seed_tf.value not in (None, "", "None") else None
         except Exception: seed = None
+        return n_boot, seed
 
-        prog_bar.value = 0; prog_bar.update()
-        prog_label.value = "Progress 0%"; prog_label.update()
-        cancel_boot = False; log(f"Running bootstrap (n={n_boot}, α={alpha_dd.value}) ...")
+    def show_resume(ckpt):
+        "Offer 'Resume' when an interrupted run for the current data and settings is on disk."
+        resume_btn.visible = ckpt is not None
+        resume_btn.text = f"Resume ({ckpt[0]}/{ckpt[1]})" if ckpt else "Resume"
+        resume_btn.update()
 
-        def _cb(iter_idx, total):
-            try:
-                frac = max(0.0, min(1.0, float(iter_idx) / float(total)))
-                prog_bar.value = frac; prog_bar.update()
-                prog_label.value = f"Progress {int(100*frac)}%"; prog_label.update()
-            except Exception: pass
-            return cancel_boot
+    def check_resume(e=None):
+        if df_ind is None or df_eggs is None: return
+        n_boot, seed = boot_settings()
+        try: show_resume(find_checkpoint(df_ind, df_eggs, n_boot, seed))
+        except Exception: pass
 
-        try:
-            boot_cache = bootstrap_params(df_ind, df_eggs, n_boot=n_boot, random_state=seed, progress=_cb, cancel=lambda: cancel_boot)
-            prog_bar.value = 1; prog_bar.update()
-            prog_label.value = "Progress 100%"; prog_label.update()
-            log("Bootstrap done.")
-        except Exception as e2:
-            log(f"Bootstrap error: {e2}"); boot_cache = None
+    def run_bootstrap(e=None, resume=False):
+        if df_ind is None or df_eggs is None: log("No data loaded."); return
+        n_boot, seed = boot_settings(); reuse = reuse_sw.value
+        tol = None if (tol_dd.value or "off") == "off" else float(tol_dd.value)
+        if (not resume and reuse and boot_cache is not None and seed is not None and not boot_cache.cancelled
+                and (boot_cache.n_boot, boot_cache.seed) == (n_boot, seed)):
+            refresh_boot_views(); return
 
-        refresh_boot_views()
+        def show(iter_idx, total):
+            frac = max(0.0, min(1.0, float(iter_idx) / float(total or 1)))
+            prog_bar.value = frac; prog_bar.update()
+            prog_label.value = f"Progress {int(100*frac)}%"; prog_label.update()
+
+        def done(res, err):
+            nonlocal boot_cache
+            if err is not None:
+                log(f"Bootstrap error: {err}"); boot_cache = None
+            else:
+                boot_cache = res
+                for w in res.warnings: log(w)
+                if res.cancelled:
+                    log(f"Bootstrap cancelled after {res.completed} of {res.n_boot} replicates"
+                        + (" (checkpoint saved)." if not res.warnings else "."))
+                    show_resume((res.completed, res.n_boot))
+                else:
+                    show(1, 1); log("Bootstrap done."); show_resume(None)
+                if res.precision is not None:
+                    pr = res.precision
+                    log(f"Adaptive bootstrap: {pr['n']} replicates, CI endpoint MC error {pr['ci_mcse']:.3f} SD, "
+                        f"p-value MC error {pr['p_mcse']:.4f}" + ("" if pr.get("converged") else f" (tolerance {tol} not reached at the cap)"))
+            refresh_boot_views()
+
+        show(0, 1)
+        cancel_boot.clear(); log(f"{'Resuming' if resume else 'Running'} bootstrap (n={n_boot}, α={alpha_dd.value}) ...")
+        prog = {"i": 0, "n": n_boot}; ind, eggs = df_ind, df_eggs
+        submit_job("bootstrap",
+                   lambda: bootstrap_params(ind, eggs, n_boot=n_boot, random_state=seed, cache=reuse, checkpoint=True, resume=resume,
+                                            tol=tol, alpha=float(alpha_dd.value or "0.05"),
+                                            progress=lambda i, n: prog.update(i=i, n=n), cancel=cancel_boot.is_set),
+                   done, progress=prog, show=show, busy=(run_boot_btn, resume_btn))
+
+    def run_permutation(e=None):
+        if df_ind is None or df_eggs is None: log("No data loaded."); return
+        n_perm, seed = boot_settings()
+        adjust = None if (adjust_dd.value or "none") == "none" else adjust_dd.value
+
+        def show(iter_idx, total):
+            frac = max(0.0, min(1.0, float(iter_idx) / float(total or 1)))
+            prog_bar.value = frac; prog_bar.update()
+            prog_label.value = f"Permutations {int(100*frac)}%"; prog_label.update()
+
+        def done(res, err):
+            if err is not None:
+                log(f"Permutation test error: {err}"); return
+            out = res.copy()
+            for c in [c for c in ("diff", "p_perm", "p_adj") if c in out.columns]:
+                out[c] = out[c].map(lambda v: f"{v:.4g}")
+            df_to_table(out, perm_table); show(1, 1)
+            log(f"Permutation test done ({int(res['n_perm'].max()) if len(res) else 0} permutations per pair).")
+            fixed = res.loc[~res["eggs_permuted"], ["A", "B"]].drop_duplicates()
+            if len(fixed):
+                log("Eggs not permuted (no FemaleID) for " + ", ".join(f"{a} vs {b}" for a, b in fixed.itertuples(index=False))
+                    + ": those p-values test survival/development only.")
+
+        show(0, 1)
+        cancel_boot.clear(); log(f"Running permutation test on R0 and rm (n={n_perm}) ...")
+        prog = {"i": 0, "n": n_perm}; ind, eggs = df_ind, df_eggs
+        submit_job("permutation",
+                   lambda: permutation_test(ind, eggs, params=("R0", "rm"), n_perm=n_perm, random_state=seed, adjust=adjust,
+                                            progress=lambda i, n: prog.update(i=i, n=n), cancel=cancel_boot.is_set),
+                   done, progress=prog, show=show, busy=(perm_btn,))
 
     run_boot_btn = ft.ElevatedButton("Run bootstrap", on_click=run_bootstrap)
+    perm_btn = ft.OutlinedButton("Permutation test (R0, rm)", on_click=run_permutation)
+    perm_table = PagedTable()
+    resume_btn = ft.OutlinedButton("Resume", visible=False, on_click=lambda e: run_bootstrap(resume=True))
+    boot_iters.on_blur = check_resume; seed_tf.on_blur = check_resume
     btn_update_view = ft.TextButton("Update view", on_click=lambda e: (refresh_boot_views(), update_boot_note()))
 
     stats_row = ft.Row(
@@ -577,6 +669,8 @@ def main(page: ft.Page):
             label_control("Seed (optional)", seed_tf, 150),
             label_control("α (significance)", alpha_dd, 140),
             label_control("Parameter", param_dd, 120),
+            label_control("p adjustment", adjust_dd, 120),
+            label_control("Adaptive stop (MC tol, n-boot = cap)", tol_dd, 120),
             label_control("Reuse samples (no recompute)", reuse_sw),
         ],
         spacing=16,
@@ -587,17 +681,20 @@ def main(page: ft.Page):
         [
             stats_row,
             ft.Row([prog_bar, ft.Text(" "), prog_label, cancel_btn], spacing=8),
-            ft.Row([run_boot_btn, btn_update_view], spacing=10),
+            ft.Row([run_boot_btn, resume_btn, perm_btn, btn_update_view], spacing=10),
             ft.Container(ft.Column([note_hdr, boot_note], spacing=4), padding=ft.padding.only(top=6, bottom=6)),
             ft.Divider(),
             ft.Text("Pairwise comparisons (95% CI and p_bootstrap)", weight="bold"),
-            pairs_table,
+            pairs_table.control,
             ft.Divider(),
             ft.Text("Letters (CLD) by parameter", weight="bold"),
-            letters_table,
+            letters_table.control,
             ft.Divider(),
             ft.Text("Means ± SE per parameter (bootstrap)", weight="bold"),
-            means_se_table,
+            means_se_table.control,
+            ft.Divider(),
+            ft.Text("Permutation tests (pooled labels, two-sided)", weight="bold"),
+            perm_table.control,
         ],
         scroll=ft.ScrollMode.AUTO,
     )
@@ -606,10 +703,18 @@ def main(page: ft.Page):
     tabs = ft.Tabs(
         selected_index=2,
         tabs=[
-            ft.Tab(text="Data", content=data_preview),
-            ft.Tab(text="Results", content=results_table),
+            ft.Tab(text="Data", content=ft.Column([label_control("Table", data_sheet_dd, 160), data_preview.control],
+                                                  scroll=ft.ScrollMode.AUTO)),
+            ft.Tab(text="Results", content=ft.Column([results_table.control], scroll=ft.ScrollMode.AUTO)),
             ft.Tab(text="Charts", content=charts_content),
-            ft.Tab(text="Console", content=console),
+            ft.Tab(text="Console", content=ft.Column([
+                console,
+                ft.Divider(),
+                ft.Text("Performance", weight="bold"),
+                ft.Row([label_control("Record timings", perf_sw), label_control("Trace memory (slow)", mem_sw), label_control("Profile jobs", profile_dd, 150)], spacing=16),
+                perf_text,
+                profile_text,
+            ], scroll=ft.ScrollMode.AUTO)),
             ft.Tab(text="Statistics", content=stats_content),
         ],
         expand=1,
@@ -620,9 +725,10 @@ def main(page: ft.Page):
     # Mount
     page.add(layout)
     page.update()
-    update_results_headers()
     update_boot_note()
 
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()   # worker processes in the frozen (PyInstaller) build
     ft.app(target=main)
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Paged DataTable for the Flet UI. Only the visible window of a DataFrame is
+formatted (column-wise, vectorized) and turned into cells; paging or new data of
+the same shape rewrites the Text values of the existing rows, so the client gets
+a small patch instead of a rebuilt table.
+"""
+from __future__ import annotations
+import math
+import flet as ft
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = (25, 50, 100, 250)
+EMPTY = "—"
+
+
+def format_window(df: pd.DataFrame, float_fmt="%.6g"):
+    "Rows of display strings for a (small) frame: floats by float_fmt, missing values as EMPTY."
+    cols = []
+    for c in df.columns:
+        s = df[c]; miss = s.isna().to_numpy()
+        if pd.api.types.is_float_dtype(s.dtype):
+            v = np.char.mod(float_fmt, s.to_numpy(dtype=float, na_value=np.nan))
+        else:
+            v = s.astype(str).to_numpy(dtype=object)
+        cols.append(np.where(miss, EMPTY, v).tolist())
+    return list(zip(*cols))
+
+
+class PagedTable:
+    """
+    DataTable with a pager. ``set_frame(df)`` shows a frame (None/empty shows a
+    placeholder); ``control`` is what goes into the layout.
+    """
+    def __init__(self, page_size=50, float_fmt="%.6g"):
+        self.df = None; self.page = 0; self.page_size = page_size; self.float_fmt = float_fmt; self._cols = None
+        self.table = ft.DataTable(columns=[ft.DataColumn(ft.Text(EMPTY))], rows=[ft.DataRow(cells=[ft.DataCell(ft.Text(EMPTY))])])
+        self.info = ft.Text("", size=12)
+        self.first = ft.IconButton(ft.icons.FIRST_PAGE, on_click=lambda e: self.goto(0))
+        self.prev = ft.IconButton(ft.icons.CHEVRON_LEFT, on_click=lambda e: self.goto(self.page - 1))
+        self.next = ft.IconButton(ft.icons.CHEVRON_RIGHT, on_click=lambda e: self.goto(self.page + 1))
+        self.last = ft.IconButton(ft.icons.LAST_PAGE, on_click=lambda e: self.goto(self.pages - 1))
+        self.size_dd = ft.Dropdown(value=str(page_size), options=[ft.dropdown.Option(str(n)) for n in PAGE_SIZES],
+                                   width=90, on_change=self._on_size)
+        self.pager = ft.Row([self.first, self.prev, self.info, self.next, self.last, self.size_dd], spacing=4, visible=False)
+        self.control = ft.Column([ft.Row([self.table], scroll=ft.ScrollMode.AUTO), self.pager], spacing=4)
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(len(self.df) / self.page_size)) if self.df is not None else 1
+
+    def set_frame(self, df, keep_page=False):
+        self.df = None if df is None or getattr(df, "empty", True) else df
+        if not keep_page: self.page = 0
+        self.render()
+
+    def goto(self, page):
+        self.page = page; self.render()
+
+    def _on_size(self, e):
+        first = self.page * self.page_size
+        self.page_size = int(self.size_dd.value or self.page_size); self.page = first // self.page_size
+        self.render()
+
+    def render(self):
+        if self.df is None:
+            self._cols = None
+            self.table.columns = [ft.DataColumn(ft.Text(EMPTY))]; self.table.rows = [ft.DataRow(cells=[ft.DataCell(ft.Text(EMPTY))])]
+            self.pager.visible = False; self._update(); return
+        n = len(self.df); self.page = min(max(self.page, 0), self.pages - 1)
+        a = self.page * self.page_size; b = min(n, a + self.page_size)
+        cols = [str(c) for c in self.df.columns]
+        if cols != self._cols:
+            self.table.columns = [ft.DataColumn(ft.Text(c)) for c in cols]; self.table.rows = []; self._cols = cols
+        values = format_window(self.df.iloc[a:b], self.float_fmt); rows = self.table.rows
+        for i, vals in enumerate(values):
+            if i < len(rows):
+                for cell, v in zip(rows[i].cells, vals):
+                    if cell.content.value != v: cell.content.value = v
+            else:
+                rows.append(ft.DataRow(cells=[ft.DataCell(ft.Text(v)) for v in vals]))
+        del rows[len(values):]
+        self.info.value = f"{a + 1}–{b} of {n}"
+        self.first.disabled = self.prev.disabled = self.page == 0
+        self.next.disabled = self.last.disabled = self.page >= self.pages - 1
+        self.pager.visible = n > PAGE_SIZES[0]
+        self._update()
+
+    def _update(self):
+        if self.control.page is not None: self.control.update()
@@ -0,0 +1,180 @@
+"""
+Lightweight timing instrumentation.
+
+``span(name)`` times a block and ``timed(name)`` a function; both cost one flag
+check while recording is off (the default; set LIFETABLE_PERF=1 or call
+``enable()``). Records are kept per run: ``reset()`` starts a run, ``report()``
+aggregates it per stage with the traced peak memory of top-level spans. Inside
+``collect(rows)`` spans of the current thread go to ``rows`` instead, so
+concurrent runs (GUI sessions) keep separate records.
+``profile()`` optionally captures cProfile (or pyinstrument, when installed)
+output for a block into ``last_profile``.
+"""
+from __future__ import annotations
+import contextlib
+import functools
+import io
+import os
+import threading
+import time
+import tracemalloc
+import pandas as pd
+
+_enabled = os.environ.get("LIFETABLE_PERF", "") not in ("", "0")
+_memory = False
+_lock = threading.Lock()
+_local = threading.local()
+_records = []          # (name, start, seconds, depth, peak_bytes or None, thread name)
+last_profile = ""      # text output of the last profile() block
+
+
+def enable(on=True, memory=False):
+    """
+    Turn recording on or off. With ``memory`` tracemalloc runs while enabled and
+    top-level spans report their peak traced allocation (numpy buffers included);
+    it slows every allocation down, so it is opt-in and stops with ``enable(False)``
+    or ``enable(memory=False)``.
+    """
+    global _enabled, _memory
+    _enabled = bool(on); mem = bool(on and memory)
+    if mem and not tracemalloc.is_tracing(): tracemalloc.start()
+    elif not mem and _memory and tracemalloc.is_tracing(): tracemalloc.stop()
+    _memory = mem
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    "Start a new run: drop the recorded spans."
+    with _lock: _records.clear()
+
+
+class _Null:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+
+_NULL = _Null()
+
+
+class _Span:
+    __slots__ = ("name", "t0", "depth")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.depth = getattr(_local, "depth", 0); _local.depth = self.depth + 1
+        if self.depth == 0 and _memory and tracemalloc.is_tracing(): tracemalloc.reset_peak()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter() - self.t0; _local.depth = self.depth
+        peak = tracemalloc.get_traced_memory()[1] if self.depth == 0 and _memory and tracemalloc.is_tracing() else None
+        rec = (self.name, self.t0, dt, self.depth, peak, threading.current_thread().name)
+        sinks = getattr(_local, "sinks", None)
+        if sinks: sinks[-1].append(rec)
+        else:
+            with _lock: _records.append(rec)
+        return False
+
+
+def span(name):
+    "Context manager timing the enclosed block as stage ``name`` (no-op when disabled)."
+    return _Span(name) if _enabled else _NULL
+
+
+def timed(name):
+    "Decorator: run the function inside ``span(name)``."
+    def wrap(f):
+        @functools.wraps(f)
+        def inner(*a, **k):
+            if not _enabled: return f(*a, **k)
+            with _Span(name): return f(*a, **k)
+        return inner
+    return wrap
+
+
+@contextlib.contextmanager
+def collect(rows):
+    "Send the spans this thread finishes inside the block to the list ``rows`` (not the global run)."
+    sinks = _local.__dict__.setdefault("sinks", []); sinks.append(rows)
+    try: yield rows
+    finally: sinks.pop()
+
+
+def records():
+    with _lock: return list(_records)
+
+
+def report(rows=None):
+    """
+    Per-stage summary of the current run (or of ``rows`` from collect): calls,
+    total/max seconds, nesting depth and peak traced memory (MiB, top-level spans
+    only), ordered by first start.
+    """
+    rows = records() if rows is None else list(rows)
+    if not rows: return pd.DataFrame(columns=["stage", "calls", "total_s", "max_s", "depth", "peak_mib"])
+    df = pd.DataFrame(rows, columns=["stage", "start", "seconds", "depth", "peak", "thread"])
+    g = df.groupby("stage", sort=False)
+    out = pd.DataFrame({"start": g["start"].min(), "calls": g.size(), "total_s": g["seconds"].sum(), "max_s": g["seconds"].max(),
+                        "depth": g["depth"].min(), "peak_mib": g["peak"].max() / 2**20})
+    return out.sort_values("start").drop(columns="start").reset_index()
+
+
+def report_text(rows=None):
+    "report() as aligned text for the Console tab."
+    df = report(rows)
+    if df.empty: return "No timings recorded."
+    lines = [f"{'stage':<34}{'calls':>6}{'total s':>10}{'max s':>10}{'peak MiB':>10}"]
+    for r in df.itertuples(index=False):
+        peak = "" if pd.isna(r.peak_mib) else f"{r.peak_mib:.1f}"
+        lines.append(f"{'  '*int(r.depth) + str(r.stage):<34}{r.calls:>6}{r.total_s:>10.3f}{r.max_s:>10.3f}{peak:>10}")
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        lines.append(f"process peak RSS: {rss / (2**20 if os.uname().sysname == 'Darwin' else 2**10):.1f} MiB")
+    except Exception:
+        pass
+    return "\n".join(lines)
+
+
+class profile:
+    """
+    Context manager capturing a profile of the block into ``text`` and ``perf.last_profile``.
+    ``kind`` is "cprofile" or "pyinstrument" (falls back to cProfile when
+    pyinstrument is not installed); ``kind=None`` disables capture.
+    """
+    def __init__(self, kind="cprofile", top=40):
+        self.kind = kind; self.top = top; self._p = None; self.text = ""
+
+    def __enter__(self):
+        if self.kind == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self._p = Profiler(); self._p.start(); return self
+            except ImportError:
+                self.kind = "cprofile"
+        if self.kind == "cprofile":
+            import cProfile
+            self._p = cProfile.Profile()
+            try: self._p.enable()
+            except ValueError: self._p = None   # another profiler is active (e.g. a concurrent job)
+        return self
+
+    def __exit__(self, *exc):
+        global last_profile
+        if self._p is None: return False
+        if self.kind == "pyinstrument":
+            self._p.stop(); self.text = self._p.output_text(unicode=True, color=False)
+        else:
+            import pstats
+            self._p.disable(); buf = io.StringIO()
+            pstats.Stats(self._p, stream=buf).sort_stats("cumulative").print_stats(self.top)
+            self.text = buf.getvalue()
+        last_profile = self.text
+        return False
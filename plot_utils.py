@@ -1,11 +1,17 @@
 
 from __future__ import annotations
+import base64
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import zipfile
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
+import perf
 
 plt.rcParams.update({
     "font.size": 12,
@@ -26,10 +32,7 @@ def _prep(ax, xlab, ylab, title):
     ax.set_xlabel(xlab); ax.set_ylabel(ylab); ax.set_title(title, pad=12); ax.margins(x=0.02, y=0.05)
 def _single(fig_size): return plt.subplots(figsize=fig_size, dpi=120, constrained_layout=True)
 
-def _series_plot(ax, s, kind):
-    y = getattr(s, kind)
-    ax.plot(s.age, y, marker="o")
-
+@perf.timed("plot.figure")
 def _multi_plot(series_map, treatments, overlay, labels, fig_size, kind):
     title_s = _lab(labels, f"{kind}_title", f"{kind} — "+"{trt}")
     title_o = _lab(labels, f"{kind}_overlay_title", f"{kind} — Overlays")
@@ -37,10 +40,6 @@ def _multi_plot(series_map, treatments, overlay, labels, fig_size, kind):
     xlab = _lab(labels, "age_days", "Age (days)")
     if overlay:
         fig, ax = _single(fig_size)
-        for tr in treatments:
-            s = series_map[tr]
-            _series_plot(ax, s, kind)
-            ax.legend_.remove() if ax.get_legend() else None
         for tr in treatments:
             s = series_map[tr]
             ax.plot(s.age, getattr(s, kind), marker="o", label=str(tr))
@@ -68,41 +67,267 @@ def fig_ex(series_map, treatments=None, overlay=True, labels=None, fig_size=(8,6
     treatments = list(series_map.keys()) if not treatments else treatments
     return _multi_plot(series_map, treatments, overlay, labels, fig_size, "ex")
 
-def export_all_figures(series_map, out_dir, dpis=(300,600), formats=("png","jpg","eps"), labels=None, fig_size=(8,6)):
-    out = Path(out_dir); out.mkdir(parents=True, exist_ok=True)
-    paths=[]; trts=list(series_map.keys())
-    for maker,name in [(fig_lx,"overlay_lx"),(fig_mx,"overlay_mx"),(fig_ex,"overlay_ex")]:
-        fig = maker(series_map, trts, True, labels, fig_size)
-        for dpi in dpis:
-            for fmt in formats:
-                p = out / f"{name}_{dpi}dpi.{fmt}"; fig.savefig(p, dpi=dpi, format=fmt, bbox_inches="tight"); paths.append(str(p))
+class ChartPreview:
+    """
+    Chart previews as base64 PNG. Rendered previews are kept in an LRU keyed by
+    (metric, treatments, overlay, size, data version); overlays are drawn on one
+    live Figure whose Line2D artists (one per metric and treatment) are created
+    once and then only shown, hidden and recoloured. Call ``invalidate()`` when
+    the series change.
+    """
+    def __init__(self, max_items=32, dpi=160):
+        self.max_items = max_items; self.dpi = dpi; self.version = 0
+        self._png = OrderedDict(); self._live = None   # (size, version, fig, ax, {(metric, trt): line})
+
+    def invalidate(self):
+        self.version += 1; self._png.clear()
+        if self._live is not None: plt.close(self._live[2]); self._live = None
+
+    def render(self, series_map, metric, treatments, overlay=True, labels=None, fig_size=(8,6)):
+        key = (metric, tuple(treatments), bool(overlay), tuple(fig_size), self.version)
+        if key in self._png:
+            self._png.move_to_end(key); return self._png[key]
+        with perf.span("plot.preview"):
+            if overlay:
+                fig = self._overlay(series_map, metric, treatments, labels, tuple(fig_size))
+            else:
+                fig = _multi_plot(series_map, list(treatments), False, labels, fig_size, metric)
+            buf = io.BytesIO(); fig.savefig(buf, format="png", dpi=self.dpi, bbox_inches="tight")
+            if not overlay: plt.close(fig)
+        self._png[key] = base64.b64encode(buf.getvalue()).decode("ascii")
+        while len(self._png) > self.max_items: self._png.popitem(last=False)
+        return self._png[key]
+
+    def _overlay(self, series_map, metric, treatments, labels, fig_size):
+        "Same drawing as _multi_plot(overlay=True), reusing the live figure's artists."
+        if self._live is None or self._live[:2] != (fig_size, self.version):
+            if self._live is not None: plt.close(self._live[2])
+            fig, ax = _single(fig_size); self._live = (fig_size, self.version, fig, ax, {})
+        _, _, fig, ax, lines = self._live
+        for ln in lines.values(): ln.set_visible(False)
+        shown = []
+        for i, tr in enumerate(treatments):
+            ln = lines.get((metric, tr))
+            if ln is None:
+                s = series_map[tr]; ln, = ax.plot(s.age, getattr(s, metric), marker="o", label=str(tr)); lines[(metric, tr)] = ln
+            ln.set_color(f"C{i}"); ln.set_zorder(2 + i); ln.set_visible(True); shown.append(ln)
+        _prep(ax, _lab(labels, "age_days", "Age (days)"), _lab(labels, f"{metric}_label", metric),
+              _lab(labels, f"{metric}_overlay_title", f"{metric} — Overlays"))
+        ax.relim(visible_only=True); ax.autoscale_view()
+        ax.legend(handles=shown, frameon=False)
+        return fig
+
+_RASTER = {"png": "PNG", "jpg": "JPEG", "jpeg": "JPEG", "tif": "TIFF", "tiff": "TIFF"}
+_MAKERS = {"lx": fig_lx, "mx": fig_mx, "ex": fig_ex}
+
+def _render_bytes(kind, s_map, trts, labels, fig_size, keys):
+    """
+    Build one figure and encode it for every (dpi, fmt) in ``keys``; returns the
+    encoded files in the same order. Raster formats are rendered once at the highest
+    DPI and downsampled (box reduce for integer ratios, Lanczos otherwise) for lower
+    DPIs; vector formats are rendered once and the bytes reused for every DPI name.
+    """
+    from PIL import Image
+    fig = _MAKERS[kind](s_map, trts, True, labels, fig_size)
+    out = []
+    try:
+        top = max(d for d, _ in keys)
+        raster = None; vector = {}
+        for dpi, fmt in keys:
+            if fmt.lower() in _RASTER:
+                if raster is None:   # raw RGBA pixels; the last draw's renderer has the tight-bbox size
+                    size = []; cid = fig.canvas.mpl_connect("draw_event", lambda e: size.append((int(e.renderer.width), int(e.renderer.height))))
+                    buf = io.BytesIO(); fig.savefig(buf, dpi=top, format="rgba", bbox_inches="tight")
+                    fig.canvas.mpl_disconnect(cid)
+                    raster = Image.frombuffer("RGBA", size[-1], buf.getbuffer(), "raw", "RGBA", 0, 1)
+                if dpi == top: img = raster
+                elif top % dpi == 0: img = raster.reduce(top // dpi)
+                else: img = raster.resize((max(1, round(raster.width*dpi/top)), max(1, round(raster.height*dpi/top))),
+                                          Image.LANCZOS, reducing_gap=2.0)
+                if _RASTER[fmt.lower()] == "JPEG": img = img.convert("RGB")
+                buf = io.BytesIO(); img.save(buf, format=_RASTER[fmt.lower()], dpi=(dpi, dpi)); out.append(buf.getvalue())
+            else:
+                if fmt not in vector:
+                    buf = io.BytesIO(); fig.savefig(buf, dpi=top, format=fmt, bbox_inches="tight"); vector[fmt] = buf.getvalue()
+                out.append(vector[fmt])
+    finally:
         plt.close(fig)
+    return out
+
+def _render_job(kind, s_map, trts, labels, fig_size, paths):
+    "_render_bytes written to ``paths`` (dict (dpi, fmt) -> path); returns the paths."
+    for p, data in zip(paths.values(), _render_bytes(kind, s_map, trts, labels, fig_size, list(paths))):
+        Path(p).write_bytes(data)
+    return list(paths.values())
+
+def _figure_jobs(series_map, dpis, formats):
+    "(kind, series, treatments, {(dpi, fmt): file name}) for the overlays, then every treatment."
+    trts = list(series_map.keys()); jobs = []
+    def job(kind, s_map, tr_list, base):
+        jobs.append((kind, s_map, tr_list, {(dpi, fmt): f"{base}_{dpi}dpi.{fmt}" for dpi in dpis for fmt in formats}))
+    for kind in ("lx","mx","ex"): job(kind, series_map, trts, f"overlay_{kind}")
     for tr in trts:
-        s_map={tr:series_map[tr]}
-        for maker,base in [(fig_lx,f"{tr}_lx"),(fig_mx,f"{tr}_mx"),(fig_ex,f"{tr}_ex")]:
-            fig = maker(s_map,[tr],True,labels,fig_size)
-            for dpi in dpis:
-                for fmt in formats:
-                    p = out / f"{base}_{dpi}dpi.{fmt}"; fig.savefig(p, dpi=dpi, format=fmt, bbox_inches="tight"); paths.append(str(p))
-            plt.close(fig)
-    return paths
-
-def make_pdf_report(summary_df, series_map, out_pdf, labels=None, fig_size=(8,6)):
-    pdfp = Path(out_pdf); pdfp.parent.mkdir(parents=True, exist_ok=True)
-    with PdfPages(pdfp) as pdf:
-        fig, ax = plt.subplots(figsize=(11.69, 8.27), dpi=150, constrained_layout=True)
-        ax.axis("off"); ax.set_title("Life Table Summary", fontsize=16, weight="bold", pad=12)
-        tbl = ax.table(cellText=summary_df.round(4).values, colLabels=summary_df.columns.tolist(), loc="center")
+        for kind in ("lx","mx","ex"): job(kind, {tr:series_map[tr]}, [tr], f"{tr}_{kind}")
+    return jobs
+
+@perf.timed("plot.export_all_figures")
+def export_all_figures(series_map, out_dir, dpis=(300,600), formats=("png","jpg","eps"), labels=None, fig_size=(8,6), n_jobs=None):
+    """
+    Write overlay figures, then per-treatment figures, for every DPI x format. Each
+    figure is built once (see _render_job) and figures are rendered in ``n_jobs``
+    worker processes (None = all cores, 1 = in-process). Paths come back in the
+    same order as the sequential loop: figure, then DPI, then format.
+    """
+    out = Path(out_dir); out.mkdir(parents=True, exist_ok=True)
+    jobs = [(kind, s_map, trts, labels, fig_size, {k: str(out / name) for k, name in names.items()})
+            for kind, s_map, trts, names in _figure_jobs(series_map, dpis, formats)]
+    workers = min(len(jobs), n_jobs or os.cpu_count() or 1)
+    if workers <= 1:
+        done = [_render_job(*j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            done = list(ex.map(_render_job, *zip(*jobs)))
+    return [p for paths in done for p in paths]
+
+_PAGE = (11.69, 8.27)   # A4 landscape, inches
+REPORT_ROWS = 30        # table rows per report page
+
+def _cell_text(df):
+    "Table cells for a report page: floats rounded to 4 decimals, missing values blank."
+    return df.round(4).astype(object).where(df.notna(), "").astype(str).values.tolist()
+
+def _table_pages(df, title, rows_per_page):
+    n = max(1, -(-len(df) // rows_per_page)); cols = [str(c) for c in df.columns]
+    return [("table", title if n == 1 else f"{title} ({i+1}/{n})", cols, _cell_text(df.iloc[i*rows_per_page:(i+1)*rows_per_page]))
+            for i in range(n)]
+
+def report_pages(summary_df, series_map, labels=None, fig_size=(8,6), pairwise=None, cld=None, rows_per_page=REPORT_ROWS):
+    """
+    Page specs of the PDF report, in order: summary table (split every
+    ``rows_per_page`` rows), the three overlays, one page of lx/mx/ex curves per
+    treatment, then the pairwise comparisons and CLD tables when given. Each spec
+    is picklable and rendered by _page_figure.
+    """
+    pages = _table_pages(summary_df, "Life Table Summary", rows_per_page)
+    pages += [("overlay", kind, series_map, labels, fig_size) for kind in ("lx","mx","ex")]
+    pages += [("treatment", tr, s, labels) for tr, s in series_map.items()]
+    if pairwise is not None and len(pairwise): pages += _table_pages(pairwise, "Pairwise comparisons", rows_per_page)
+    if cld is not None and len(cld): pages += _table_pages(cld, "Means ± SE and compact letter display", rows_per_page)
+    return pages
+
+def _page_figure(kind, *args):
+    if kind == "table":
+        title, cols, rows = args
+        fig, ax = plt.subplots(figsize=_PAGE, dpi=150, constrained_layout=True)
+        ax.axis("off"); ax.set_title(title, fontsize=16, weight="bold", pad=12)
+        tbl = ax.table(cellText=rows, colLabels=cols, loc="center")
         tbl.auto_set_font_size(False); tbl.set_fontsize(8); tbl.scale(1,1.2)
-        pdf.savefig(fig, bbox_inches="tight"); plt.close(fig)
-        for mk in (fig_lx, fig_mx, fig_ex):
-            fig = mk(series_map, treatments=list(series_map.keys()), overlay=True, labels=labels, fig_size=fig_size)
-            pdf.savefig(fig, bbox_inches="tight"); plt.close(fig)
+        return fig
+    if kind == "overlay":
+        metric, s_map, labels, fig_size = args
+        return _MAKERS[metric](s_map, list(s_map.keys()), True, labels, fig_size)
+    tr, s, labels = args
+    fig, axs = plt.subplots(1, 3, figsize=_PAGE, dpi=120, constrained_layout=True)
+    for ax, m in zip(axs, ("lx","mx","ex")):
+        ax.plot(s.age, getattr(s, m), marker="o")
+        _prep(ax, _lab(labels, "age_days", "Age (days)"), _lab(labels, f"{m}_label", m), _lab(labels, f"{m}_title", m).format(trt=tr))
+    fig.suptitle(str(tr), fontsize=16, weight="bold")
+    return fig
+
+def _render_page(spec):
+    "One report page as the bytes of a single-page PDF."
+    fig = _page_figure(*spec)
+    try:
+        buf = io.BytesIO(); fig.savefig(buf, format="pdf", bbox_inches="tight"); return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+@perf.timed("plot.pdf_report")
+def make_pdf_report(summary_df, series_map, out_pdf, labels=None, fig_size=(8,6), pairwise=None, cld=None, n_jobs=None,
+                    rows_per_page=REPORT_ROWS):
+    """
+    Write the report of report_pages. Pages are rendered in ``n_jobs`` worker
+    processes (None = all cores) and merged in order with pypdf; without pypdf, or
+    with n_jobs=1, they are drawn one by one into a single PdfPages.
+    """
+    pdfp = Path(out_pdf); pdfp.parent.mkdir(parents=True, exist_ok=True)
+    pages = report_pages(summary_df, series_map, labels, fig_size, pairwise, cld, rows_per_page)
+    workers = min(len(pages), n_jobs or os.cpu_count() or 1)
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        workers = 1
+    if workers <= 1:
+        with PdfPages(pdfp) as pdf:
+            for spec in pages:
+                fig = _page_figure(*spec); pdf.savefig(fig, bbox_inches="tight"); plt.close(fig)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(_render_page, pages))
+        with perf.span("plot.pdf_merge"):
+            w = PdfWriter()
+            for b in parts: w.append(io.BytesIO(b))
+            w.write(str(pdfp))
     return str(pdfp)
 
+# Already-compressed payloads are stored as is; deflating them again costs time for ~0% gain
+_STORED = {".png", ".jpg", ".jpeg", ".gif", ".pdf", ".xlsx", ".zip", ".parquet"}
+
+def zip_compression(name):
+    "ZIP_STORED for already-compressed formats (PNG, JPEG, PDF, XLSX, ...), ZIP_DEFLATED otherwise."
+    return zipfile.ZIP_STORED if Path(name).suffix.lower() in _STORED else zipfile.ZIP_DEFLATED
+
+class ZipBundle:
+    """
+    Output ZIP written entry by entry. ``add_bytes`` streams an in-memory file into the
+    archive (and into ``loose_dir`` as well, when given); ``add_file`` copies a file
+    from disk. Compression is chosen per entry by ``zip_compression``.
+    """
+    def __init__(self, zip_path, loose_dir=None):
+        self.path = Path(zip_path); self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.loose_dir = Path(loose_dir) if loose_dir else None
+        if self.loose_dir: self.loose_dir.mkdir(parents=True, exist_ok=True)
+        self.zip = zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED, compresslevel=6); self.names = []
+
+    def add_bytes(self, name, data):
+        self.zip.writestr(name, data, compress_type=zip_compression(name)); self.names.append(name)
+        if self.loose_dir: (self.loose_dir / Path(name).name).write_bytes(data)
+
+    def add_file(self, path, arcname=None):
+        p = Path(path); name = arcname or p.name
+        self.zip.write(p, name, compress_type=zip_compression(name)); self.names.append(name)
+
+    def close(self):
+        self.zip.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close(); return False
+
+@perf.timed("plot.export_figures_zip")
+def export_figures_zip(series_map, bundle, dpis=(300,600), formats=("png","jpg","eps"), labels=None, fig_size=(8,6), n_jobs=None, prefix=""):
+    """
+    export_all_figures without the round trip through disk: figures are encoded in
+    memory (in ``n_jobs`` worker processes) and appended to ``bundle`` (a ZipBundle)
+    in the sequential order as they arrive. Returns the archive names.
+    """
+    jobs = _figure_jobs(series_map, dpis, formats)
+    args = [(kind, s_map, trts, labels, fig_size, list(names)) for kind, s_map, trts, names in jobs]
+    workers = min(len(jobs), n_jobs or os.cpu_count() or 1); out = []
+    def consume(results):
+        for (_, _, _, names), data in zip(jobs, results):
+            for name, b in zip(names.values(), data):
+                bundle.add_bytes(prefix + name, b); out.append(prefix + name)
+    if workers <= 1:
+        consume(_render_bytes(*a) for a in args)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            consume(ex.map(_render_bytes, *zip(*args)))
+    return out
+
+@perf.timed("plot.zip")
 def zip_outputs(zip_path, files):
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
+    with ZipBundle(zip_path) as z:
         for f in files:
             p = Path(f)
-            if p.exists(): z.write(p, p.name)
+            if p.exists(): z.add_file(p)
     return str(zip_path)
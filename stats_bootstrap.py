@@ -1,116 +1,865 @@
 from __future__ import annotations
+import hashlib
+import json
+import os
+import string
+import tempfile
+import time
+from statistics import NormalDist
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
 import numpy as np, pandas as pd
-from lifetable_core import analyze_by_treatment, _std_cols
+import perf
+from data_io import CACHE_DIR, _evict
+from lifetable_core import _std_cols, solve_rm
 
-def bootstrap_params(df_ind, df_eggs, n_boot=1000, random_state=None, progress=None, cancel=None):
+PARAMS = ["R0","T","rm","lambda","DT"]
+ESTIMATOR_VERSION = 2   # bump when resampling or parameter estimation changes, to invalidate cached runs
+BOOT_CACHE_MAX_BYTES = int(float(os.environ.get("LIFETABLE_BOOT_CACHE_MB", "512")) * 2**20)
+
+@dataclass
+class _Cohort:
+    """Per-treatment arrays shared by every bootstrap replicate."""
+    life: np.ndarray       # int lifespan per individual (clipped at 0)
+    imm: np.ndarray        # ImmatureDays per individual (NaN -> 0)
+    fem: np.ndarray        # True where Sex starts with "F"
+    eggs: np.ndarray       # (n_groups, n_days) eggs summed per female cluster and adult day
+    day0: int              # adult day of column 0 in ``eggs``
+    resample_eggs: bool    # False when eggs are copied as-is (no FemaleID clusters)
+
+def _cohort_arrays(ind: pd.DataFrame, eggs: pd.DataFrame) -> _Cohort:
+    imm = ind["ImmatureDays"].fillna(0)
+    life = imm.astype(int).to_numpy() + ind["AdultDays"].fillna(0).astype(int).to_numpy()
+    fem = ind["Sex"].astype(str).str.upper().str.startswith("F").to_numpy()
+    codes = None
+    if "FemaleID" in eggs.columns and not eggs.empty:
+        codes, uniq = pd.factorize(eggs["FemaleID"], sort=True)
+        if len(uniq) == 0: codes = None
+    clustered = codes is not None
+    if eggs.empty:
+        n_groups, codes, keep = 0, np.zeros(0, dtype=int), np.zeros(0, dtype=bool)
+    elif codes is None:
+        n_groups, codes, keep = 1, np.zeros(len(eggs), dtype=int), np.ones(len(eggs), dtype=bool)
+    else:
+        n_groups, keep = int(codes.max()) + 1, codes >= 0
+    day = eggs["AdultDay"].fillna(0).astype(int).to_numpy()[keep] if len(eggs) else np.zeros(0, dtype=int)
+    val = eggs["Eggs"].fillna(0).to_numpy(dtype=float)[keep] if len(eggs) else np.zeros(0)
+    day0 = int(day.min()) if day.size else 0
+    E = np.zeros((n_groups, int(day.max()) - day0 + 1 if day.size else 1))
+    np.add.at(E, (codes[keep], day - day0), val)
+    return _Cohort(np.clip(life, 0, None), imm.to_numpy(dtype=float), fem, E, day0, clustered and n_groups > 0)
+
+def _row_counts(idx: np.ndarray, n: int) -> np.ndarray:
+    "Turn a (B, k) index matrix into (B, n) draw counts."
+    B = idx.shape[0]
+    flat = (idx + (np.arange(B) * n)[:, None]).ravel()
+    return np.bincount(flat, minlength=B*n).reshape(B, n)
+
+def _params_from_draws(c: _Cohort, ind_idx: np.ndarray, fem_idx: np.ndarray | None) -> np.ndarray:
+    """
+    Return a (B, 5) array of R0, T, rm, lambda, DT for B resamples of one cohort.
+    Each row matches ``_lifetable_for_treatment`` on the resampled rows; R0 and T
+    sums run on exact-length rows so they are bit-identical, and rm is solved for
+    the whole block in one ``solve_rm`` call.
+    """
+    B, n0 = ind_idx.shape
+    hist = _row_counts(c.life[ind_idx], int(c.life.max()) + 1)
+    alive = hist[:, ::-1].cumsum(axis=1)[:, ::-1]           # alive[:, a] = #(life >= a)
+    S = None
+    if c.eggs.shape[0] > 0:
+        S = _row_counts(fem_idx, c.eggs.shape[0]) @ c.eggs if c.resample_eggs else np.broadcast_to(c.eggs, (B, c.eggs.shape[1]))
+    return _params_from_counts(c, alive, n0, c.fem[ind_idx].sum(axis=1), c.imm[ind_idx].sum(axis=1), S)
+
+def _params_from_counts(c: _Cohort, alive, n0, fem0, imm_sum, S):
+    """
+    _params_from_draws from per-row sufficient statistics: alive (B, cap) counts of
+    life >= age, sample size n0, female count, ImmatureDays sum and summed eggs S
+    (B, days) aligned with c.day0 (None without eggs).
+    """
+    B, cap = alive.shape
+    max_age = (alive > 0).sum(axis=1) - 1
+    lx = np.zeros((B, cap)); lx[:, :-1] = alive[:, 1:] / n0   # lx[:, x] = #(life > x) / n0
+    mx = np.zeros((B, cap))
+    if S is not None:
+        avg_imm = np.rint(imm_sum / n0).astype(int)
+        ages = np.arange(cap)
+        cols = ages[None, :] - (avg_imm + c.day0)[:, None]
+        valid = (cols >= 0) & (cols < S.shape[1]) & (ages[None, :] <= max_age[:, None]) & (fem0 > 0)[:, None]
+        v = np.take_along_axis(S, np.clip(cols, 0, S.shape[1]-1), axis=1)
+        mx[valid] = (v / np.maximum(fem0, 1)[:, None])[valid]
+    out = np.empty((B, 5))
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for L in np.unique(max_age + 1):
+            rows = np.flatnonzero(max_age + 1 == L)
+            lxr = np.ascontiguousarray(lx[rows, :L]); mxr = np.ascontiguousarray(mx[rows, :L]); x = np.arange(L)
+            R0 = np.sum(lxr*mxr, axis=1)
+            T = np.where(R0 > 0, np.sum(x*lxr*mxr, axis=1) / np.where(R0 > 0, R0, 1.0), 0.0)
+            out[rows, 0] = R0; out[rows, 1] = T
+        out[:, 2] = solve_rm(lx*mx)[0]
+        out[:, 3] = np.exp(out[:, 2])
+        out[:, 4] = np.where(out[:, 2] > 0, np.log(2) / out[:, 2], np.nan)
+    return out
+
+_SHARD = 250            # replicates per seed stream; fixed so results do not depend on n_jobs
+CHECK_GROWTH = 1.5      # adaptive runs test precision at min_boot, then each time the replicate count grows by half
+_WORKER_COHORTS = None  # set in pool workers by _init_worker
+
+def _init_worker(cohorts):
+    global _WORKER_COHORTS
+    _WORKER_COHORTS = cohorts
+
+def _run_shard(seed, size, cohorts=None):
+    "Draw and evaluate ``size`` replicates for every treatment from one seed stream."
+    cohorts = _WORKER_COHORTS if cohorts is None else cohorts
+    rng = np.random.default_rng(seed); out = {}
+    for tr, c in cohorts.items():
+        n = len(c.life); g = c.eggs.shape[0]
+        ind_idx = rng.integers(0, n, size=(size, n))
+        fem_idx = rng.integers(0, g, size=(size, g)) if c.resample_eggs else None
+        out[tr] = _params_from_draws(c, ind_idx, fem_idx)
+    return out
+
+def _estimate(c: _Cohort) -> np.ndarray:
+    "Full-data R0, T, rm, lambda, DT of one cohort (matches analyze_by_treatment)."
+    return _params_from_draws(c, np.arange(len(c.life))[None, :], np.arange(c.eggs.shape[0])[None, :] if c.resample_eggs else None)[0]
+
+def _jackknife_cohort(c: _Cohort, block=4096):
+    """
+    Full-data estimate (5,) and leave-one-out replicates of one cohort: one (n, 5)
+    array dropping each individual and, when eggs are resampled by FemaleID, one
+    (g, 5) array dropping each female cluster. Each replicate's statistics are the
+    full-data ones minus the dropped individual's (or cluster's) contribution, so
+    the cost is O((n + g) * ages) instead of a resample per replicate.
     """
-    Return dict[treatment] -> DataFrame of bootstrap values (R0, T, rm, lambda, DT).
+    n, g = len(c.life), c.eggs.shape[0]
+    est = _estimate(c)
+    cap = int(c.life.max()) + 1 if n else 1; ages = np.arange(cap)
+    alive = np.bincount(c.life, minlength=cap)[::-1].cumsum()[::-1]
+    F = c.fem.sum(); I = c.imm.sum(); Etot = c.eggs.sum(axis=0, keepdims=True) if g else None
+    groups = []
+    if n > 1:
+        groups.append(np.concatenate([
+            _params_from_counts(c, alive[None, :] - (ages[None, :] <= c.life[s:s+block, None]), n - 1,
+                                F - c.fem[s:s+block], I - c.imm[s:s+block],
+                                None if Etot is None else np.broadcast_to(Etot, (len(c.life[s:s+block]), Etot.shape[1])))
+            for s in range(0, n, block)]))
+    if c.resample_eggs and g > 1:
+        groups.append(np.concatenate([
+            _params_from_counts(c, np.broadcast_to(alive, (len(c.eggs[s:s+block]), cap)), n,
+                                np.full(len(c.eggs[s:s+block]), F), np.full(len(c.eggs[s:s+block]), I), Etot - c.eggs[s:s+block])
+            for s in range(0, g, block)]))
+    return est, groups
+
+def _acceleration(groups):
+    """
+    BCa acceleration per parameter from jackknife replicates of independently
+    resampled groups: a = sum U^3/n^3 / (6 (sum U^2/n^2)^1.5), U = (n-1)(mean - theta_(i))
+    (Efron 1987); non-finite replicates are left out, a = 0 when undefined.
+    """
+    num = np.zeros(len(PARAMS)); den = np.zeros(len(PARAMS))
+    for J in groups:
+        ok = np.isfinite(J); k = ok.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            U = (k - 1) * (np.nanmean(np.where(ok, J, np.nan), axis=0) - J)
+            U = np.where(ok, U, 0.0)
+            num += np.where(k > 1, (U**3).sum(axis=0) / np.maximum(k, 1)**3, 0.0)
+            den += np.where(k > 1, (U**2).sum(axis=0) / np.maximum(k, 1)**2, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / (6 * den**1.5), 0.0)
+
+@perf.timed("boot.jackknife")
+def jackknife_params(df_ind, df_eggs):
+    """
+    Leave-one-out engine: dict[treatment] -> {"estimate": (5,), "individuals": (n, 5),
+    "clusters": (g, 5), "accel": (5,)} for R0, T, rm, lambda, DT. Every replicate is
+    computed from the cohort arrays in vectorized blocks instead of n re-analyses.
+    """
+    df_ind, df_eggs = _std_cols(df_ind.copy(), df_eggs.copy())
+    out = {}
+    for tr in sorted(df_ind["Treatment"].unique()):
+        c = _cohort_arrays(df_ind[df_ind["Treatment"]==tr], df_eggs[df_eggs["Treatment"]==tr])
+        est, groups = _jackknife_cohort(c)
+        out[tr] = {"estimate": est, "individuals": groups[0] if len(c.life) > 1 else np.empty((0, 5)),
+                   "clusters": groups[-1] if c.resample_eggs and c.eggs.shape[0] > 1 else np.empty((0, 5)),
+                   "accel": _acceleration(groups)}
+    return out
+
+def bca_interval(x, theta, a, level=0.95):
+    """
+    Bias-corrected and accelerated percentile interval of the finite bootstrap values
+    x around the full-data estimate theta with acceleration a; (nan, nan) when the
+    bias correction is undefined (theta outside the bootstrap distribution).
+    """
+    x = np.asarray(x, dtype=float); x = x[np.isfinite(x)]
+    if not x.size or not np.isfinite(theta): return float("nan"), float("nan")
+    p0 = (np.sum(x < theta) + 0.5*np.sum(x == theta)) / x.size
+    if not 0 < p0 < 1: return float("nan"), float("nan")
+    nd = NormalDist(); z0 = nd.inv_cdf(p0); a = float(a) if np.isfinite(a) else 0.0
+    qs = []
+    for q in ((1 - level)/2, (1 + level)/2):
+        z = z0 + nd.inv_cdf(q); qs.append(100*nd.cdf(z0 + z / (1 - a*z)))
+    lo, hi = np.percentile(x, qs)
+    return float(lo), float(hi)
+
+class BootResult(Mapping):
+    """
+    Bootstrap replicates in one preallocated float64 array ``data`` of shape
+    (treatments, n_boot, params). Acts as a read-only dict of treatment -> DataFrame
+    (views over the first ``completed`` rows), so code written for the old dict of
+    frames keeps working. ``seed`` is the random_state passed in and ``entropy`` the
+    root SeedSequence entropy, which reproduces the run even when seed is None.
+    An adaptive run that converged early has ``n_boot`` == ``completed`` < the cap.
+    ``accel`` (BCa acceleration) is computed by the jackknife on first access.
+    ``warnings`` lists checkpoint writes that failed (the run itself went on).
+    """
+    __slots__ = ("data", "trts", "params", "seed", "entropy", "n_boot", "completed", "precision", "estimate", "_accel", "_cohorts",
+                 "warnings")
+
+    def __init__(self, trts, n_boot, params=PARAMS, seed=None, entropy=None, data=None, completed=None, precision=None,
+                 estimate=None, accel=None):
+        self.trts = list(trts); self.params = list(params); self.n_boot = int(n_boot)
+        self.data = np.full((len(self.trts), self.n_boot, len(self.params)), np.nan) if data is None else np.asarray(data, dtype=float)
+        self.seed = seed; self.entropy = entropy
+        self.completed = self.n_boot if completed is None else int(completed)
+        self.precision = precision   # mc_precision() of an adaptive run
+        self.estimate = estimate; self._accel = accel   # (treatments, params) full-data estimates and BCa acceleration
+        self._cohorts = None   # cohort arrays kept by bootstrap_params until accel is needed
+        self.warnings = []
+
+    @property
+    def accel(self):
+        if self._accel is None and self._cohorts is not None:
+            with perf.span("boot.jackknife"):
+                self._accel = np.array([_acceleration(_jackknife_cohort(self._cohorts[tr])[1]) for tr in self.trts]).reshape(len(self.trts), len(PARAMS))
+            self._cohorts = None
+        return self._accel
+
+    @accel.setter
+    def accel(self, value):
+        self._accel = value; self._cohorts = None
+
+    @property
+    def cancelled(self):
+        return self.completed < self.n_boot
+
+    def __getitem__(self, tr):
+        return pd.DataFrame(self.data[self.trts.index(tr), :self.completed], columns=self.params, copy=False)
+
+    def __iter__(self):
+        return iter(self.trts)
+
+    def __len__(self):
+        return len(self.trts)
+
+    def __repr__(self):
+        return f"BootResult({len(self.trts)} treatments, {self.completed}/{self.n_boot} replicates, seed={self.seed})"
+
+    def array(self, params=PARAMS):
+        "(completed, treatments, params) view/copy in the layout of ``boot_array``."
+        q = [self.params.index(p) for p in params]
+        X = self.data[:, :self.completed].transpose(1, 0, 2)
+        return X if q == list(range(len(self.params))) else X[:, :, q]
+
+@perf.timed("boot.bootstrap")
+def bootstrap_params(df_ind, df_eggs, n_boot=1000, random_state=None, progress=None, cancel=None, n_jobs=None,
+                     cache=False, checkpoint=False, resume=False, tol=None, p_tol=0.005, alpha=0.05, min_boot=2*_SHARD):
+    """
+    Return a BootResult (dict-like: treatment -> DataFrame of R0, T, rm, lambda, DT).
     - df_ind, df_eggs: original data frames
     - progress(iter, total): optional callback
     - cancel(): optional function returning True to stop early
+    - n_jobs: worker processes (None/1 = in-process, <=0 = all cores)
+
+    Individuals are resampled with replacement and eggs by whole FemaleID clusters.
+    Each treatment is reduced to arrays once; replicates are split into fixed-size
+    shards, each with its own stream from ``SeedSequence.spawn``, so a seed gives
+    the same values for any ``n_jobs``. Shards are written straight into the
+    result array. ``cancel`` is checked between shards and a cancelled run keeps the
+    shards completed so far, in shard order, with ``completed`` < ``n_boot``.
+    With ``cache`` and an integer seed, finished runs are read from / written to the
+    on-disk cache (see load_boot_cache). With ``checkpoint`` the finished shards and
+    the root seed entropy are saved every CHECKPOINT_S seconds and on cancel;
+    ``resume`` continues from that checkpoint and gives the same values as an
+    uninterrupted run (see resume_bootstrap).
+
+    With ``tol`` the run is adaptive and ``n_boot`` is only a cap: at ``min_boot``
+    replicates and then each time the count has grown by CHECK_GROWTH (and at the
+    cap) the Monte Carlo error of the first contiguous shards is checked with
+    mc_precision, and the run stops when the CI endpoint error is <= tol bootstrap
+    SDs and the error of p-values near ``alpha`` is <= p_tol. The result keeps
+    exactly those shards (so it does not depend on ``n_jobs``) and carries the
+    achieved precision in ``precision``.
     """
-    rng = np.random.default_rng(random_state)
+    adaptive = tol is not None
+    if cache and not adaptive:
+        with perf.span("boot.cache"): hit = load_boot_cache(df_ind, df_eggs, n_boot, random_state)
+        if hit is not None:
+            if progress is not None: progress(n_boot, n_boot)
+            return hit
+    ckpt = checkpoint_path(df_ind, df_eggs, n_boot, random_state) if (checkpoint or resume) else None
+    state = _load_checkpoint(ckpt) if resume else None
+    entropy = state["entropy"] if state is not None else np.random.default_rng(random_state).bit_generator.seed_seq.entropy
+    seed_seq = np.random.SeedSequence(entropy)
     df_ind, df_eggs = _std_cols(df_ind.copy(), df_eggs.copy())
     trts = sorted(df_ind["Treatment"].unique())
-    boots = {tr: pd.DataFrame(columns=["R0","T","rm","lambda","DT"]) for tr in trts}
-    step = max(1, n_boot//100)
-
-    # Pre-split by treatment for speed
-    ind_by_tr = {tr: df_ind[df_ind["Treatment"]==tr].reset_index(drop=True) for tr in trts}
-    eggs_by_tr = {tr: df_eggs[df_eggs["Treatment"]==tr].reset_index(drop=True) for tr in trts}
-
-    for b in range(n_boot):
-        if cancel is not None and cancel():
-            break
-
-        # Resample per treatment (individual-level bootstrap; eggs by FemaleID if available)
-        ind_samp=[]; eggs_samp=[]
-        for tr in trts:
-            ind_t = ind_by_tr[tr]
-            # avoid empty crash
-            if len(ind_t) == 0:
-                ind_boot = ind_t.copy()
-            else:
-                # row-resample with replacement
-                idx = rng.integers(0, len(ind_t), size=len(ind_t))
-                ind_boot = ind_t.iloc[idx].reset_index(drop=True)
-            ind_samp.append(ind_boot)
-
-            eg_t = eggs_by_tr[tr]
-            if "FemaleID" in eg_t.columns and not eg_t.empty:
-                groups = [g for _, g in eg_t.groupby("FemaleID")]
-                if len(groups) > 0:
-                    # resample whole females (cluster bootstrap)
-                    idxg = rng.integers(0, len(groups), size=len(groups))
-                    eg_boot = pd.concat([groups[i] for i in idxg], ignore_index=True)
-                else:
-                    eg_boot = eg_t.copy()
-            else:
-                eg_boot = eg_t.copy()
-            eggs_samp.append(eg_boot)
-
-        ind_samp = pd.concat(ind_samp, ignore_index=True) if ind_samp else pd.DataFrame()
-        eggs_samp = pd.concat(eggs_samp, ignore_index=True) if eggs_samp else pd.DataFrame()
-
-        summ, _ = analyze_by_treatment(ind_samp, eggs_samp)
-        for _, row in summ.iterrows():
-            tr = row["Tratamento"]
-            boots[tr].loc[len(boots[tr])] = [row.get("R0"), row.get("T"), row.get("rm"), row.get("lambda"), row.get("DT")]
-
-        if progress is not None and (b % step == 0):
-            progress(b+1, n_boot)
+    with perf.span("boot.prepare"):
+        cohorts = {tr: _cohort_arrays(df_ind[df_ind["Treatment"]==tr], df_eggs[df_eggs["Treatment"]==tr]) for tr in trts}
+
+    res = BootResult(trts, n_boot, seed=random_state, entropy=entropy)
+    res.estimate = np.array([_estimate(cohorts[tr]) for tr in trts]).reshape(len(trts), len(PARAMS)); res._cohorts = cohorts
+    sizes = [min(_SHARD, n_boot - s) for s in range(0, n_boot, _SHARD)]
+    seeds = seed_seq.spawn(len(sizes))
+    done_shards = set(); done = 0
+    if state is not None and state["data"].shape == res.data.shape and [str(t) for t in trts] == state["trts"]:
+        res.data[:] = state["data"]; done_shards.update(state["shards"]); done = sum(sizes[k] for k in done_shards)
+    todo = [k for k in range(len(sizes)) if k not in done_shards]
+    last_save = [time.monotonic()]
+    stop = {"prefix": 0, "n": None, "next": min(min_boot, n_boot)}   # adaptive: shards seen / shards kept / next check size
+
+    def check():
+        """
+        Adaptive mode: test contiguous prefixes of shards once they reach the next
+        check size, which grows by CHECK_GROWTH after each test (each test sorts
+        every replicate so far); True once one has converged.
+        """
+        while stop["n"] is None and stop["prefix"] in done_shards:
+            stop["prefix"] += 1; n = sum(sizes[:stop["prefix"]])
+            if n < stop["next"] and stop["prefix"] < len(sizes): continue
+            stop["next"] = n * CHECK_GROWTH
+            with perf.span("boot.precision"): res.precision = mc_precision(res.data[:, :n].transpose(1, 0, 2), alpha)
+            if res.precision["ci_mcse"] <= tol and res.precision["p_mcse"] <= p_tol:
+                stop["n"] = stop["prefix"]; res.precision["converged"] = True
+        return stop["n"] is not None
 
+    def store(k, out):
+        for t, tr in enumerate(trts):
+            res.data[t, k*_SHARD:k*_SHARD + sizes[k]] = out[tr]
+        done_shards.add(k)
+        if ckpt is not None and time.monotonic() - last_save[0] >= CHECKPOINT_S and len(done_shards) < len(sizes):
+            _save_checkpoint(ckpt, res, done_shards); last_save[0] = time.monotonic()
+        return adaptive and check()
+
+    with perf.span("boot.shards"):
+        if n_jobs is not None and n_jobs <= 0: n_jobs = os.cpu_count() or 1
+        if n_jobs is None or n_jobs == 1 or len(todo) < 2:
+            if adaptive and check(): todo = []
+            for k in todo:
+                if cancel is not None and cancel():
+                    break
+                converged = store(k, _run_shard(seeds[k], sizes[k], cohorts)); done += sizes[k]
+                if progress is not None:
+                    progress(done, n_boot)
+                if converged: break
+        else:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(todo)), initializer=_init_worker, initargs=(cohorts,)) as ex:
+                futs = {ex.submit(_run_shard, seeds[k], sizes[k]): k for k in todo}
+                for fut in as_completed(futs):
+                    converged = store(futs[fut], fut.result()); done += sizes[futs[fut]]
+                    if progress is not None:
+                        progress(done, n_boot)
+                    if converged or (cancel is not None and cancel()):
+                        ex.shutdown(wait=False, cancel_futures=True)
+                        break
+
+    if adaptive and stop["n"] is not None:   # converged: keep the checked prefix only
+        done_shards = set(range(stop["n"])); res.n_boot = sum(sizes[:stop["n"]])
+        res.data = res.data[:, :res.n_boot].copy()
+    elif adaptive and len(done_shards) == len(sizes):
+        if res.precision is None or res.precision["n"] != res.n_boot: res.precision = mc_precision(res.data.transpose(1, 0, 2), alpha)
+        res.precision["converged"] = False
+    if ckpt is not None:
+        if len(done_shards) < len(sizes) and stop["n"] is None: _save_checkpoint(ckpt, res, done_shards)
+        else:
+            try: ckpt.unlink(missing_ok=True)
+            except OSError: pass
+    # a cancelled parallel run can leave gaps: move finished shards to the front, in order
+    pos = 0
+    for k in sorted(done_shards):
+        if k*_SHARD != pos: res.data[:, pos:pos + sizes[k]] = res.data[:, k*_SHARD:k*_SHARD + sizes[k]]
+        pos += sizes[k]
+    res.completed = pos
+    if cache and not res.cancelled:
+        with perf.span("boot.cache"): store_boot_cache(df_ind, df_eggs, res)
     if progress is not None:
         progress(n_boot, n_boot)
-    return boots
-
-def pairwise_compare(boot_cache, param="R0"):
-    trs = sorted(boot_cache.keys()); rows=[]
-    for i in range(len(trs)):
-        for j in range(i+1, len(trs)):
-            A,B = trs[i], trs[j]
-            a = boot_cache[A][param].astype(float).to_numpy() if param in boot_cache[A].columns else np.array([])
-            b = boot_cache[B][param].astype(float).to_numpy() if param in boot_cache[B].columns else np.array([])
-            n = min(len(a), len(b))
-            if n==0: 
-                continue
-            mask = np.isfinite(a[:n]) & np.isfinite(b[:n])
-            if mask.sum()==0:
-                continue
-            d = b[:n][mask]-a[:n][mask]
-            ci_low, ci_high = np.percentile(d, [2.5,97.5])
-            p = 2*min((d<=0).mean(), (d>=0).mean())
-            rows.append({"param":param, "A":A, "B":B, "diff":float(d.mean()), "ci_low":float(ci_low), "ci_high":float(ci_high), "p_bootstrap":float(p), "n_boot":int(n)})
-    return pd.DataFrame(rows)
+    return res
+
+def _quantile_mcse(S, n, q):
+    """
+    Monte Carlo SE of the q-quantile of each row of the row-sorted S (n[i] finite
+    values first): half the spread between the order statistics at n*q -+ sqrt(n*q*(1-q)).
+    """
+    h = np.sqrt(n*q*(1 - q)); last = np.maximum(n - 1, 0)
+    lo = np.clip(np.floor(n*q - h).astype(int) - 1, 0, last); hi = np.clip(np.ceil(n*q + h).astype(int) - 1, 0, last)
+    return (np.take_along_axis(S, hi[:, None], 1) - np.take_along_axis(S, lo[:, None], 1))[:, 0] / 2
+
+def mc_precision(X, alpha=0.05):
+    """
+    Monte Carlo precision of a (replicates, treatments, params) bootstrap array:
+    ci_mcse is the largest SE of a 2.5/97.5% percentile endpoint (per treatment and
+    for every pairwise difference) in units of that quantity's bootstrap SD, and
+    p_mcse the largest SE of a pairwise two-sided bootstrap p-value among those
+    within 3 SE of ``alpha`` (p-values far from alpha cannot change a decision).
+    """
+    R, K, P = X.shape
+    ii, jj = np.triu_indices(K, 1)
+    D = (X[:, jj, :] - X[:, ii, :]).transpose(1, 2, 0).reshape(-1, R)
+    V = np.concatenate([X.transpose(1, 2, 0).reshape(-1, R), D])
+    V = np.where(np.isfinite(V), V, np.nan); n = np.isfinite(V).sum(axis=1)
+    ok = n > 1; nt = int(ok[:K*P].sum()); V, n = V[ok], n[ok]   # first nt rows are per treatment, the rest differences
+    out = {"n": int(R), "ci_mcse": 0.0, "p_mcse": 0.0}
+    if not V.size: return out
+    with np.errstate(invalid="ignore", divide="ignore"):
+        S = np.sort(V, axis=1); sd = np.nanstd(V, axis=1, ddof=1)
+        se = np.maximum(_quantile_mcse(S, n, 0.025), _quantile_mcse(S, n, 0.975))
+        out["ci_mcse"] = float(np.max(np.where(sd > 0, se / sd, 0.0)))
+        if len(V) > nt:
+            Dn, nd = V[nt:], n[nt:]
+            m = np.minimum((Dn <= 0).sum(axis=1), (Dn >= 0).sum(axis=1)) / nd
+            se_p = 2*np.sqrt(m*(1 - m)/nd); near = np.abs(np.minimum(2*m, 1) - alpha) <= 3*se_p
+            out["p_mcse"] = float(np.max(se_p[near])) if near.any() else 0.0
+    return out
+
+def resume_bootstrap(df_ind, df_eggs, n_boot=1000, random_state=None, **kw):
+    "Continue the checkpointed run for this data, n_boot and seed (a fresh run if there is none)."
+    return bootstrap_params(df_ind, df_eggs, n_boot=n_boot, random_state=random_state, checkpoint=True, resume=True, **kw)
+
+# ------------------------------------------------------------------
+# Checkpoints of unfinished runs (CACHE_DIR/checkpoints)
+# ------------------------------------------------------------------
+CHECKPOINT_S = 30.0   # minimum seconds between periodic checkpoint writes
+
+def checkpoint_path(df_ind, df_eggs, n_boot, seed):
+    "Checkpoint file of a run; unseeded runs of the same data and n_boot share one slot."
+    tag = _int_seed(seed); tag = "none" if tag is None else tag
+    h = hashlib.blake2b(f"{ESTIMATOR_VERSION}|{_SHARD}|{int(n_boot)}|{tag}|".encode(), digest_size=16)
+    h.update(data_fingerprint(df_ind, df_eggs).encode())
+    return CACHE_DIR / "checkpoints" / f"{h.hexdigest()}.npz"
 
-def cld_from_pmatrix(trt_order, comp_df, alpha=0.05):
-    letters={}; current='a'; letters[trt_order[0]]=current
-    for t in trt_order[1:]:
-        differs=False
-        for prev in trt_order:
-            if prev==t: break
-            row = comp_df[((comp_df["A"]==prev)&(comp_df["B"]==t)) | ((comp_df["A"]==t)&(comp_df["B"]==prev))]
-            if not row.empty and float(row.iloc[0]["p_bootstrap"]) < alpha:
-                differs=True; break
-        if differs: current = chr(ord(current)+1)
-        letters[t]=current
-    return pd.DataFrame({"Tratamento":trt_order, "Letras":[letters[t] for t in trt_order]})
-
-def summarize_boot(boot_cache):
-    "Return DataFrame with mean and SE for each parameter and treatment."
+def _save_checkpoint(path, res, shards):
+    "Save the finished shards; a failed write is noted in ``res.warnings`` and the run carries on."
+    meta = {"trts": [str(t) for t in res.trts], "n_boot": res.n_boot, "entropy": int(res.entropy), "shards": sorted(shards)}
+    try:
+        _savez_atomic(path, data=res.data, meta=np.array(json.dumps(meta)))
+    except Exception as e:
+        msg = f"Checkpoint not saved ({type(e).__name__}: {e})"
+        if msg not in res.warnings: res.warnings.append(msg)
+        return False
+    return True
+
+def _load_checkpoint(path):
+    if path is None or not path.exists(): return None
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"])); meta["data"] = z["data"]
+        return meta
+    except Exception:
+        return None
+
+def find_checkpoint(df_ind, df_eggs, n_boot, seed):
+    "Return (completed, n_boot) of a resumable run for this data and settings, or None."
+    state = _load_checkpoint(checkpoint_path(df_ind, df_eggs, n_boot, seed))
+    if state is None: return None
+    sizes = [min(_SHARD, n_boot - s) for s in range(0, n_boot, _SHARD)]
+    return sum(sizes[k] for k in state["shards"] if k < len(sizes)), state["n_boot"]
+
+# ------------------------------------------------------------------
+# On-disk cache of finished runs (CACHE_DIR/boot, LRU by file mtime)
+# ------------------------------------------------------------------
+_FP_COLS = {"ind": ["Treatment","ID","Sex","ImmatureDays","AdultDays"], "eggs": ["Treatment","FemaleID","AdultDay","Eggs"]}
+
+def data_fingerprint(df_ind, df_eggs) -> str:
+    "Content hash of the normalized columns the estimator reads (row order included)."
+    df_ind, df_eggs = _std_cols(df_ind.copy(), df_eggs.copy())
+    h = hashlib.blake2b(digest_size=16)
+    for name, df in (("ind", df_ind), ("eggs", df_eggs)):
+        cols = [c for c in _FP_COLS[name] if c in df.columns]
+        h.update(f"{name}|{len(df)}|{','.join(cols)}|".encode())
+        for c in cols:
+            h.update(pd.util.hash_pandas_object(df[c], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def _int_seed(seed):
+    return None if isinstance(seed, bool) or not isinstance(seed, (int, np.integer)) else int(seed)
+
+def boot_cache_key(df_ind, df_eggs, n_boot, seed):
+    "Cache key of a run, or None when the run is not reproducible (no integer seed)."
+    if _int_seed(seed) is None: return None
+    h = hashlib.blake2b(f"{ESTIMATOR_VERSION}|{_SHARD}|{int(n_boot)}|{int(seed)}|".encode(), digest_size=16)
+    h.update(data_fingerprint(df_ind, df_eggs).encode())
+    return h.hexdigest()
+
+def _boot_cache_path(key):
+    return CACHE_DIR / "boot" / f"{key}.npz"
+
+def load_boot_cache(df_ind, df_eggs, n_boot, seed):
+    "Return the cached BootResult for this data, n_boot and seed, or None."
+    key = boot_cache_key(df_ind, df_eggs, n_boot, seed)
+    path = _boot_cache_path(key) if key else None
+    if path is None or not path.exists(): return None
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"])); data = z["data"]
+            extra = {k: z[k] for k in ("estimate", "accel") if k in z.files}
+        res = BootResult(meta["trts"], meta["n_boot"], meta["params"], seed=meta["seed"], entropy=meta["entropy"], data=data, **extra)
+        os.utime(path)   # mark as recently used
+        return res
+    except Exception:
+        return None
+
+def store_boot_cache(df_ind, df_eggs, res, max_bytes=None):
+    """
+    Write a finished BootResult to the cache and evict least recently used runs
+    beyond max_bytes. Returns the cache file, or None when the run is not cacheable
+    or the write failed (the cache is best effort; the result is never lost to it).
+    """
+    key = boot_cache_key(df_ind, df_eggs, res.n_boot, res.seed)
+    if key is None or res.cancelled or not all(isinstance(t, str) for t in res.trts): return None
+    path = _boot_cache_path(key)
+    meta = {"trts": res.trts, "params": res.params, "n_boot": res.n_boot, "seed": int(res.seed), "entropy": int(res.entropy),
+            "estimator": ESTIMATOR_VERSION}
+    try:
+        extra = {k: getattr(res, k) for k in ("estimate", "accel") if getattr(res, k) is not None}
+        _savez_atomic(path, data=res.data, meta=np.array(json.dumps(meta)), **extra)
+        _evict(path.parent, BOOT_CACHE_MAX_BYTES if max_bytes is None else max_bytes, keep=(path,), pattern="*.npz")
+    except Exception:
+        return None
+    return path
+
+def _savez_atomic(path, **arrays):
+    "np.savez_compressed into a unique temp file next to ``path``, then rename it into place."
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.stem + ".", suffix=".tmp", delete=False)
+    try:
+        with f: np.savez_compressed(f, **arrays)
+        os.replace(f.name, path)
+    except BaseException:
+        Path(f.name).unlink(missing_ok=True); raise
+
+# ------------------------------------------------------------------
+# Permutation tests (pooled labels, shared cohort arrays)
+# ------------------------------------------------------------------
+_PERM_WORKER = None   # set in pool workers by _init_perm_worker
+
+def _pool_pair(a: _Cohort, b: _Cohort):
+    """
+    Pool two cohorts for label permutation. Returns (cA, cB, nA, gA, permute_eggs):
+    cA and cB share the pooled individual arrays; when both have FemaleID clusters
+    the egg clusters are pooled too (day-aligned) and permuted with the labels,
+    otherwise each side keeps its own summed eggs.
+    """
+    life, imm, fem = (np.concatenate([getattr(a, f), getattr(b, f)]) for f in ("life", "imm", "fem"))
+    if a.resample_eggs and b.resample_eggs:
+        day0 = min(a.day0, b.day0); width = max(a.day0 + a.eggs.shape[1], b.day0 + b.eggs.shape[1]) - day0
+        E = np.zeros((a.eggs.shape[0] + b.eggs.shape[0], width))
+        E[:a.eggs.shape[0], a.day0 - day0:a.day0 - day0 + a.eggs.shape[1]] = a.eggs
+        E[a.eggs.shape[0]:, b.day0 - day0:b.day0 - day0 + b.eggs.shape[1]] = b.eggs
+        c = _Cohort(life, imm, fem, E, day0, True)
+        return c, c, len(a.life), a.eggs.shape[0], True
+    side = lambda x: _Cohort(life, imm, fem, x.eggs.sum(axis=0, keepdims=True) if x.eggs.shape[0] else x.eggs, x.day0, False)
+    return side(a), side(b), len(a.life), a.eggs.shape[0], False
+
+def _init_perm_worker(pairs):
+    global _PERM_WORKER
+    _PERM_WORKER = pairs
+
+def _run_perm_shard(seed, size, pairs=None, cols=None):
+    """
+    ``size`` label permutations of every pair from one seed stream. Returns
+    (exceed, valid) arrays of shape (pairs, params): permuted |B - A| >= observed,
+    and permutations with a finite difference.
+    """
+    pairs, cols = _PERM_WORKER if pairs is None else (pairs, cols)
+    rng = np.random.default_rng(seed)
+    exceed = np.zeros((len(pairs), len(cols)), dtype=np.int64); valid = np.zeros_like(exceed)
+    for k, (cA, cB, nA, gA, perm_eggs, obs) in enumerate(pairs):
+        N = len(cA.life); G = cA.eggs.shape[0]
+        P = rng.permuted(np.broadcast_to(np.arange(N), (size, N)), axis=1)
+        F = rng.permuted(np.broadcast_to(np.arange(G), (size, G)), axis=1) if perm_eggs else None
+        pa = _params_from_draws(cA, P[:, :nA], None if F is None else F[:, :gA])[:, cols]
+        pb = _params_from_draws(cB, P[:, nA:], None if F is None else F[:, gA:])[:, cols]
+        with np.errstate(invalid="ignore"):
+            d = np.abs(pb - pa); ok = np.isfinite(d)
+            exceed[k] += (ok & (d >= np.abs(obs) * (1 - 1e-12))).sum(axis=0); valid[k] += ok.sum(axis=0)
+    return exceed, valid
+
+@perf.timed("boot.permutation")
+def permutation_test(df_ind, df_eggs, params=("R0", "rm"), n_perm=9999, random_state=None, n_jobs=None,
+                     adjust=None, progress=None, cancel=None):
+    """
+    Two-sided permutation test of B - A for every pair of treatments and parameter.
+    Individuals (and FemaleID egg clusters, when both treatments have them) of the
+    two treatments are pooled and their labels permuted with group sizes kept; each
+    permutation is evaluated from the shared cohort arrays in batches, never through
+    analyze_by_treatment. p_perm = (1 + #{|d*| >= |d|}) / (1 + #finite d*), which is
+    exact for Monte Carlo sampling. Batches run in fixed seed shards as in
+    bootstrap_params, so results do not depend on ``n_jobs``; ``adjust`` ('holm' or
+    'bh') adds p_adj within each parameter. Rows are grouped by param like
+    pairwise_compare_all. ``eggs_permuted`` is False for pairs where a treatment has
+    no FemaleID clusters: their eggs stay with their own label, so the p-value only
+    reflects survival and development, not fecundity.
+    """
+    params = list(params); cols = [PARAMS.index(p) for p in params]
+    df_ind, df_eggs = _std_cols(df_ind.copy(), df_eggs.copy())
+    trts = sorted(df_ind["Treatment"].unique())
+    cohorts = {tr: _cohort_arrays(df_ind[df_ind["Treatment"]==tr], df_eggs[df_eggs["Treatment"]==tr]) for tr in trts}
+    est = {tr: _estimate(c) for tr, c in cohorts.items()}
+    ii, jj = np.triu_indices(len(trts), 1)
+    pairs = [_pool_pair(cohorts[trts[i]], cohorts[trts[j]]) + ((est[trts[j]] - est[trts[i]])[cols],) for i, j in zip(ii, jj)]
+
+    seed_seq = np.random.default_rng(random_state).bit_generator.seed_seq
+    sizes = [min(_SHARD, n_perm - s) for s in range(0, n_perm, _SHARD)]
+    seeds = seed_seq.spawn(len(sizes))
+    exceed = np.zeros((len(pairs), len(cols)), dtype=np.int64); valid = np.zeros_like(exceed); done = 0
+    if n_jobs is not None and n_jobs <= 0: n_jobs = os.cpu_count() or 1
+    if n_jobs is None or n_jobs == 1 or len(sizes) < 2:
+        for seed, size in zip(seeds, sizes):
+            if cancel is not None and cancel():
+                break
+            e, v = _run_perm_shard(seed, size, pairs, cols); exceed += e; valid += v; done += size
+            if progress is not None:
+                progress(done, n_perm)
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(sizes)), initializer=_init_perm_worker, initargs=((pairs, cols),)) as ex:
+            futs = {ex.submit(_run_perm_shard, seed, size): size for seed, size in zip(seeds, sizes)}
+            for fut in as_completed(futs):
+                e, v = fut.result(); exceed += e; valid += v; done += futs[fut]
+                if progress is not None:
+                    progress(done, n_perm)
+                if cancel is not None and cancel():
+                    ex.shutdown(wait=False, cancel_futures=True)
+                    break
+
+    rows = {k: [] for k in ("param", "A", "B", "diff", "p_perm", "n_perm", "eggs_permuted", "p_adj")}
+    for q, p in enumerate(params):
+        obs = np.array([pr[-1][q] for pr in pairs]).reshape(-1)
+        with np.errstate(invalid="ignore"):
+            pv = np.where(np.isfinite(obs) & (valid[:, q] > 0), (1 + exceed[:, q]) / (1 + valid[:, q]), np.nan)
+        rows["param"] += [p]*len(pairs); rows["A"] += [trts[i] for i in ii]; rows["B"] += [trts[j] for j in jj]
+        rows["diff"] += list(obs); rows["p_perm"] += list(pv); rows["n_perm"] += list(valid[:, q])
+        rows["eggs_permuted"] += [bool(pr[4]) for pr in pairs]
+        rows["p_adj"] += list(p_adjust(pv, adjust)) if adjust else []
+    if not adjust: del rows["p_adj"]
+    return pd.DataFrame(rows).astype({"diff": float, "p_perm": float, "n_perm": int, "eggs_permuted": bool})
+
+def boot_array(boot_cache, params=PARAMS):
+    """
+    Stack a boot cache into a (replicates, treatments, params) float array, NaN-padded
+    when treatments have different lengths. Returns (X, treatments, lengths) where
+    lengths[k, q] is the replicate count of treatment k for params[q] (0 if missing).
+    """
+    if isinstance(boot_cache, BootResult) and boot_cache.trts == sorted(boot_cache.trts) and set(params) <= set(boot_cache.params):
+        return boot_cache.array(params), boot_cache.trts, np.full((len(boot_cache), len(params)), boot_cache.completed)
+    trs = sorted(boot_cache.keys())
+    R = max((len(df) for df in boot_cache.values()), default=0)
+    X = np.full((R, len(trs), len(params)), np.nan); lens = np.zeros((len(trs), len(params)), dtype=int)
+    for k, tr in enumerate(trs):
+        df = boot_cache[tr]
+        for q, p in enumerate(params):
+            if p in df.columns:
+                v = df[p].astype(float).to_numpy(); X[:len(v), k, q] = v; lens[k, q] = len(v)
+    return X, trs, lens
+
+def _row_percentile(D, n, q):
+    """
+    np.percentile (linear) of the n[i] finite values in each row of D (other entries NaN).
+    A full row sort (NaNs go last) beats np.partition with several kth values here.
+    """
+    v = (n[:, None] - 1) * (np.asarray(q, dtype=float) / 100)
+    lo = np.floor(v).astype(int); hi = np.minimum(lo + 1, n[:, None] - 1); g = v - lo
+    if not D.size: return np.full(v.shape, np.nan)
+    S = np.sort(D, axis=1)
+    a = np.take_along_axis(S, lo, 1); b = np.take_along_axis(S, hi, 1)
+    d = b - a
+    return np.where(g >= 0.5, b - d*(1 - g), a + d*g)
+
+def p_adjust(p, method):
+    "Holm or Benjamini-Hochberg ('bh') adjusted p-values; NaNs are left out of the family."
+    p = np.asarray(p, dtype=float); out = np.full(p.shape, np.nan)
+    ok = np.flatnonzero(np.isfinite(p)); m = ok.size
+    if m == 0: return out
+    o = ok[np.argsort(p[ok], kind="mergesort")]; ps = p[o]
+    if method == "holm":
+        adj = np.maximum.accumulate(np.minimum(1.0, (m - np.arange(m)) * ps))
+    elif method in ("bh", "fdr_bh"):
+        adj = np.minimum.accumulate(np.minimum(1.0, ps * m / np.arange(1, m + 1))[::-1])[::-1]
+    else:
+        raise ValueError(f"Unknown p adjustment: {method}")
+    out[o] = adj
+    return out
+
+def pairwise_from_array(X, trts, params=PARAMS, adjust=None, lens=None):
+    """
+    All pairwise bootstrap differences (B - A, A before B in ``trts`` order) for every
+    parameter of a (replicates, treatments, params) array. Replicate i of A is paired
+    with replicate i of B and pairs where either value is not finite are dropped.
+    Percentile 95% CIs and two-sided p-values are computed for all pairs at once;
+    ``adjust`` ('holm' or 'bh') adds p_adj, adjusted within each parameter.
+    """
+    R, K, P = X.shape
+    if lens is None: lens = np.full((K, P), R)
+    ii, jj = np.triu_indices(K, 1)
+    cols = {k: [] for k in ("param","A","B","diff","ci_low","ci_high","p_bootstrap","p_adj","n_boot")}
+    for q, p in enumerate(params):
+        Xp = np.ascontiguousarray(X[:, :, q].T)              # (K, R)
+        ok = np.isfinite(Xp[ii]) & np.isfinite(Xp[jj])
+        D = np.where(ok, Xp[jj] - Xp[ii], np.nan)            # (pairs, R)
+        cnt = ok.sum(axis=1); n_pair = np.minimum(lens[ii, q], lens[jj, q])
+        keep = (n_pair > 0) & (cnt > 0)
+        D, cnt, c = D[keep], cnt[keep], np.maximum(cnt[keep], 1)
+        with np.errstate(invalid="ignore"):
+            ci = _row_percentile(D, c, [2.5, 97.5])
+            pv = 2*np.minimum((D <= 0).sum(axis=1) / c, (D >= 0).sum(axis=1) / c)
+        cols["param"] += [p]*int(keep.sum())
+        cols["A"] += [trts[i] for i in ii[keep]]; cols["B"] += [trts[j] for j in jj[keep]]
+        cols["diff"] += list(np.nansum(D, axis=1) / c); cols["ci_low"] += list(ci[:, 0]); cols["ci_high"] += list(ci[:, 1])
+        cols["p_bootstrap"] += list(pv); cols["n_boot"] += list(n_pair[keep])
+        cols["p_adj"] += list(p_adjust(pv, adjust)) if adjust else []
+    if not adjust: del cols["p_adj"]
+    out = pd.DataFrame(cols)
+    return out.astype({"diff": float, "ci_low": float, "ci_high": float, "p_bootstrap": float, "n_boot": int})
+
+@perf.timed("boot.pairwise")
+def pairwise_compare_all(boot_cache, params=PARAMS, adjust=None):
+    "pairwise_compare for several parameters in one vectorized pass (rows grouped by param)."
+    X, trs, lens = boot_array(boot_cache, params)
+    return pairwise_from_array(X, trs, params, adjust=adjust, lens=lens)
+
+def pairwise_compare(boot_cache, param="R0", adjust=None):
+    return pairwise_compare_all(boot_cache, [param], adjust=adjust)
+
+def _absorb(cols, keep=()):
+    "Drop duplicate, empty and subset columns (bitmasks), largest first; ``keep`` columns are kept as is."
+    keep = list(keep)
+    for c in sorted(set(cols), key=lambda c: (-bin(c).count("1"), c)):
+        if c and not any(c & ~d == 0 for d in keep): keep.append(c)
+    return keep
+
+def _clique_cover(nd, k):
+    """
+    Greedy edge clique cover of the not-different graph (``nd[i]`` bitmask of the
+    treatments not different from i, i included): each uncovered pair (i, j), in
+    order, grows a clique by adding, in order, common neighbours that cover a pair
+    not covered yet. Polynomial
+    in k, unlike insert-and-absorb on scattered significance patterns.
+    """
+    unc = [nd[i] & ~(1 << i) for i in range(k)]; cols = []
+    for i in range(k):
+        if not unc[i] and not nd[i] & ~(1 << i): cols.append(1 << i)   # different from every other treatment
+        while unc[i]:
+            j = (unc[i] & -unc[i]).bit_length() - 1
+            C = (1 << i) | (1 << j); cand = nd[i] & nd[j] & ~C
+            while cand:
+                b = cand & -cand; cand ^= b
+                v = b.bit_length() - 1
+                if nd[v] & C == C and unc[v] & C: C |= b   # only members that cover a new pair
+            rest = C
+            while rest:
+                b = rest & -rest; rest ^= b; unc[b.bit_length() - 1] &= ~C
+            cols.append(C)
+    return cols
+
+def _sweep(cols, k):
+    """
+    Drop memberships every pair of which another column covers, column by column:
+    cnt[t, u] counts the columns holding both t and u, so t can leave column n when
+    cnt[t, u] > 1 for every u in it (t itself included: t keeps a letter).
+    """
+    mem = [np.array([t for t in range(k) if c >> t & 1], dtype=int) for c in cols]
+    cnt = np.zeros((k, k), dtype=np.int64)
+    for m in mem: cnt[np.ix_(m, m)] += 1
+    for n in range(len(cols)):
+        m = mem[n]
+        for t in m[(cnt[np.ix_(m, m)] > 1).all(axis=1)].tolist():   # counts only fall: other members stay
+            m = mem[n]
+            if (cnt[t, m] > 1).all():
+                cnt[t, m] -= 1; cnt[m, t] -= 1; cnt[t, t] += 1
+                mem[n] = m[m != t]; cols[n] &= ~(1 << t)
+    return cols
+
+def _letter_labels(n):
+    base = string.ascii_lowercase + string.ascii_uppercase
+    return [base[i % len(base)] + (str(i // len(base)) if i >= len(base) else "") for i in range(n)]
+
+CLD_MAX_COLS = 64   # insert-and-absorb columns (at least 2 per treatment) before switching to a clique cover
+
+@perf.timed("boot.cld")
+def cld_from_pmatrix(trt_order, comp_df, alpha=0.05, p_col="p_bootstrap"):
+    """
+    Compact letter display by insert-and-absorb (Piepho 2004) followed by a sweep of
+    redundant letters. Insert-and-absorb can blow up when significant pairs are
+    scattered rather than banded; past CLD_MAX_COLS columns it gives way to a greedy
+    clique cover (_clique_cover). Treatments share a letter exactly when they are not
+    significantly different (p >= alpha; pairs missing from comp_df count as not
+    different), so a treatment can carry several letters. Letters are assigned in
+    ``trt_order`` order (pass treatments sorted by mean).
+    """
+    trt_order = list(trt_order); k = len(trt_order)
+    if k == 0: return pd.DataFrame({"Tratamento": [], "Letras": []})
+    pos = {t: i for i, t in enumerate(trt_order)}
+    P = np.full((k, k), np.nan)
+    if comp_df is not None and len(comp_df):
+        ia = comp_df["A"].map(pos); ib = comp_df["B"].map(pos); ok = (ia.notna() & ib.notna()).to_numpy()
+        ia = ia[ok].astype(int).to_numpy(); ib = ib[ok].astype(int).to_numpy(); pv = comp_df[p_col].astype(float).to_numpy()[ok]
+        P[ib[::-1], ia[::-1]] = pv[::-1]; P[ia[::-1], ib[::-1]] = pv[::-1]   # first row wins on duplicates
+    with np.errstate(invalid="ignore"):
+        sig = np.argwhere(np.triu(P < alpha, 1))
+
+    # columns are bitmasks over trt_order positions
+    cols = [(1 << k) - 1]; cap = max(CLD_MAX_COLS, 2*k)
+    for i, j in sig:
+        bi, bj = 1 << int(i), 1 << int(j); split = []; keep = []
+        for c in cols:
+            if c & bi and c & bj: split += [c & ~bi, c & ~bj]
+            else: keep.append(c)
+        if split: cols = _absorb(split, keep)   # untouched columns cannot become subsets of split ones
+        if len(cols) > cap: break
+    if len(cols) > cap:
+        nd = [(1 << k) - 1] * k
+        for i, j in sig: nd[i] &= ~(1 << int(j)); nd[j] &= ~(1 << int(i))
+        cols = _absorb(_clique_cover(nd, k))
+    cols = sorted(_absorb(_sweep(cols, k)), key=lambda c: (c & -c).bit_length())
+    labels = _letter_labels(len(cols))
+    letters = ["".join(labels[m] for m, c in enumerate(cols) if c >> i & 1) for i in range(k)]
+    return pd.DataFrame({"Tratamento": trt_order, "Letras": letters})
+
+def cld_table(boot_cache, comp_all, params=PARAMS, alpha=0.05, p_col="p_bootstrap"):
+    "Treatment x parameter letters: cld_from_pmatrix per parameter, treatments ordered by bootstrap mean."
+    X, trts, _ = boot_array(boot_cache, params)
+    out = pd.DataFrame({"Tratamento": trts})
+    for q, p in enumerate(params):
+        means = np.nanmean(X[:, :, q], axis=0); order = [trts[i] for i in np.argsort(means, kind="stable")]
+        cld = cld_from_pmatrix(order, comp_all[comp_all["param"] == p], alpha=alpha, p_col=p_col)
+        out[p] = out["Tratamento"].map(dict(zip(cld["Tratamento"], cld["Letras"])))
+    return out
+
+@perf.timed("boot.summary")
+def summarize_boot(boot_cache, level=0.95, bca=True):
+    """
+    Return DataFrame with mean and SE for each parameter and treatment, plus BCa
+    interval columns (<p>_bca_low/_bca_high) when ``bca`` and the cache is a
+    BootResult carrying full-data estimates (the jackknife for the acceleration
+    only runs here, on first use).
+    """
     rows=[]; params=["R0","T","rm","lambda","DT"]
-    for tr, df in boot_cache.items():
+    bca = bca and getattr(boot_cache, "estimate", None) is not None and getattr(boot_cache, "accel", None) is not None
+    for k, (tr, df) in enumerate(boot_cache.items()):
         row={"Tratamento":tr}
         for p in params:
             if p not in df.columns:
                 row[p+"_mean"] = float("nan")
                 row[p+"_se"] = float("nan")
                 continue
-            arr = df[p].astype(float).to_numpy()
+            arr = df[p].to_numpy(dtype=float)
             arr = arr[np.isfinite(arr)]
             if p=="DT":
                 arr = arr[arr>0]
             row[p+"_mean"] = float(np.nanmean(arr)) if arr.size else float("nan")
             row[p+"_se"]   = float(np.nanstd(arr, ddof=1)) if arr.size>1 else float("nan")
+            if bca and p in boot_cache.params:
+                q = boot_cache.params.index(p)
+                row[p+"_bca_low"], row[p+"_bca_high"] = bca_interval(arr, boot_cache.estimate[k, q], boot_cache.accel[k, q], level)
         rows.append(row)
     return pd.DataFrame(rows)
@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def cohort(n=40, seed=0, female_ids=True, treatment="A", fecundity=5.0):
+    "One treatment in the normalized individuals / eggs layout; FemaleID all NaN when not ``female_ids``."
+    rng = np.random.default_rng(seed)
+    ids = np.array([f"{treatment}-{i:03d}" for i in range(n)], dtype=object)
+    imm = rng.integers(2, 8, n); adult = rng.integers(1, 25, n); fem = rng.random(n) < 0.5
+    ind = pd.DataFrame({"Treatment": treatment, "ID": ids, "Sex": np.where(fem, "F", "M"),
+                        "ImmatureDays": imm.astype(float), "AdultDays": adult.astype(float)})
+    who = np.repeat(np.flatnonzero(fem), adult[fem]); day = np.concatenate([np.arange(1, a + 1) for a in adult[fem]] or [[]])
+    keep = rng.random(who.size) < 0.7
+    eggs = pd.DataFrame({"Treatment": treatment, "FemaleID": ids[who[keep]] if female_ids else np.nan,
+                         "AdultDay": day[keep].astype(float), "Eggs": rng.poisson(fecundity, keep.sum()).astype(float)})
+    return ind, eggs
+
+
+@pytest.fixture
+def make_cohort():
+    return cohort
+
+
+@pytest.fixture
+def two_treatments():
+    "Treatments A and B (B more fecund) in one individuals / eggs pair."
+    (ia, ea), (ib, eb) = cohort(treatment="A"), cohort(seed=1, treatment="B", fecundity=8.0)
+    return pd.concat([ia, ib], ignore_index=True), pd.concat([ea, eb], ignore_index=True)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    "Point the bootstrap cache and checkpoints at a temporary folder."
+    import stats_bootstrap
+    monkeypatch.setattr(stats_bootstrap, "CACHE_DIR", tmp_path / "cache")
+    return tmp_path / "cache"
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pytest
+
+import stats_bootstrap
+from stats_bootstrap import bootstrap_params, load_boot_cache, resume_bootstrap
+
+
+def test_unwritable_cache_keeps_the_result(two_treatments, cache_dir):
+    ind, eggs = two_treatments
+    cache_dir.write_text("not a folder")   # every write under it fails
+    res = bootstrap_params(ind, eggs, n_boot=300, random_state=3, cache=True)
+    assert res.completed == 300 and np.isfinite(res.data).any()
+
+
+def test_cache_roundtrip_and_eviction_skip_vanished_files(two_treatments, cache_dir, monkeypatch):
+    ind, eggs = two_treatments
+    res = bootstrap_params(ind, eggs, n_boot=300, random_state=3, cache=True)
+    hit = load_boot_cache(ind, eggs, 300, 3)
+    np.testing.assert_array_equal(hit.data, res.data)
+    ghost = cache_dir / "boot" / "gone.npz"; ghost.write_bytes(b"x")
+    real_stat = type(ghost).stat
+    def stat(self, *a, **k):
+        if self.name == "gone.npz": self.unlink(missing_ok=True)   # another process evicted it after the listing
+        return real_stat(self, *a, **k)
+    monkeypatch.setattr(type(ghost), "stat", stat)
+    stats_bootstrap._evict(cache_dir / "boot", 0, pattern="*.npz")
+    assert not [f for f in os.listdir(cache_dir / "boot") if f.endswith(".tmp")]
+
+
+def test_resumed_run_is_bit_identical(two_treatments, cache_dir):
+    ind, eggs = two_treatments
+    full = bootstrap_params(ind, eggs, n_boot=1000, random_state=11)
+    seen = []
+    part = bootstrap_params(ind, eggs, n_boot=1000, random_state=11, checkpoint=True,
+                            progress=lambda i, n: seen.append(i), cancel=lambda: len(seen) >= 2)
+    assert part.cancelled and 0 < part.completed < 1000
+    res = resume_bootstrap(ind, eggs, n_boot=1000, random_state=11)
+    assert res.completed == 1000
+    np.testing.assert_array_equal(res.data, full.data)
+    assert not any((cache_dir / "checkpoints").glob("*.npz"))
+
+
+def test_failed_checkpoint_write_does_not_stop_the_run(two_treatments, cache_dir, monkeypatch):
+    ind, eggs = two_treatments
+    cache_dir.write_text("not a folder")
+    monkeypatch.setattr(stats_bootstrap, "CHECKPOINT_S", 0.0)   # save after every shard
+    res = bootstrap_params(ind, eggs, n_boot=1000, random_state=11, checkpoint=True)
+    assert res.completed == 1000 and len(res.warnings) == 1
+    np.testing.assert_array_equal(res.data, bootstrap_params(ind, eggs, n_boot=1000, random_state=11).data)
+
+
+@pytest.mark.parametrize("n_jobs", [2, 3])
+def test_same_replicates_for_any_n_jobs(two_treatments, n_jobs):
+    ind, eggs = two_treatments
+    ref = bootstrap_params(ind, eggs, n_boot=1100, random_state=7, n_jobs=1)
+    res = bootstrap_params(ind, eggs, n_boot=1100, random_state=7, n_jobs=n_jobs)
+    assert res.completed == ref.completed == 1100
+    np.testing.assert_array_equal(res.data, ref.data)
+
+
+def test_adaptive_run_stops_early_with_the_same_data_for_any_n_jobs(two_treatments):
+    ind, eggs = two_treatments
+    runs = [bootstrap_params(ind, eggs, n_boot=5000, random_state=5, tol=0.15, p_tol=0.05, n_jobs=j) for j in (1, 2, 3)]
+    ref = runs[0]
+    assert ref.precision["converged"] and ref.precision["ci_mcse"] <= 0.15
+    assert 500 <= ref.n_boot == ref.completed < 5000 and ref.n_boot % 250 == 0
+    full = bootstrap_params(ind, eggs, n_boot=5000, random_state=5)
+    np.testing.assert_array_equal(ref.data, full.data[:, :ref.n_boot])   # the first shards of the uncapped run
+    for res in runs[1:]:
+        assert res.n_boot == ref.n_boot and res.precision == ref.precision
+        np.testing.assert_array_equal(res.data, ref.data)
@@ -0,0 +1,25 @@
+import itertools
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stats_bootstrap import cld_from_pmatrix
+
+
+@pytest.mark.parametrize("k, frac", [(8, "banded"), (30, "banded"), (36, 0.05), (60, 0.05), (60, 0.5), (80, 0.9)])
+def test_letters_shared_exactly_when_not_different(k, frac):
+    "Banded patterns go through insert-and-absorb, scattered ones through the clique-cover fallback."
+    trts = [f"T{i:02d}" for i in range(k)]; rng = np.random.default_rng(k)
+    pairs = list(itertools.combinations(range(k), 2))
+    if frac == "banded":
+        m = np.sort(rng.normal(0, 3, k)); sig = np.array([abs(m[i] - m[j]) > 2 for i, j in pairs])
+    else:
+        sig = rng.random(len(pairs)) < frac
+    comp = pd.DataFrame({"A": [trts[i] for i, _ in pairs], "B": [trts[j] for _, j in pairs], "p_bootstrap": np.where(sig, 0.001, 0.5)})
+    out = cld_from_pmatrix(trts, comp)
+    letters = {t: set(re.findall(r"[a-zA-Z]\d*", l)) for t, l in zip(out["Tratamento"], out["Letras"])}
+    assert all(letters.values())
+    for (i, j), s in zip(pairs, sig):
+        assert bool(letters[trts[i]] & letters[trts[j]]) is not bool(s)
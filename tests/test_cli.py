@@ -0,0 +1,17 @@
+import json
+
+import pandas as pd
+
+import lifetable
+
+
+def test_missing_input_counts_as_failed(make_cohort, tmp_path, capsys):
+    ind, eggs = make_cohort()
+    good = tmp_path / "good.xlsx"
+    with pd.ExcelWriter(good, engine="xlsxwriter") as xw:
+        ind.to_excel(xw, sheet_name="individuals", index=False); eggs.to_excel(xw, sheet_name="eggs", index=False)
+    code = lifetable.main([str(good), str(tmp_path / "missing.xlsx"), "--out", str(tmp_path / "out")])
+    recs = [json.loads(l) for l in capsys.readouterr().out.splitlines()]
+    assert code == 1
+    assert {r["file"]: r["status"] for r in recs if r["event"] == "file"} == {str(good): "ok", str(tmp_path / "missing.xlsx"): "error"}
+    assert recs[-1] | {"seconds": 0} == {"event": "summary", "files": 2, "ok": 1, "failed": 1, "seconds": 0}
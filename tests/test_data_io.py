@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from data_io import load_dataset
+
+
+@pytest.mark.parametrize("pick", ["folder", "individuals.csv", "eggs.csv"])
+def test_pair_loads_from_folder_or_either_table(make_cohort, tmp_path, pick):
+    ind, eggs = make_cohort()
+    ind.to_csv(tmp_path / "individuals.csv", index=False); eggs.to_csv(tmp_path / "eggs.csv", index=False)
+    df_ind, df_eggs = load_dataset(tmp_path if pick == "folder" else tmp_path / pick)
+    assert len(df_ind) == len(ind) and len(df_eggs) == len(eggs)
+    assert df_eggs["Eggs"].astype(float).sum() == eggs["Eggs"].sum()
+
+
+@pytest.mark.parametrize("layout", ["pair", "long"])
+def test_hive_partitioned_parquet_keeps_treatment(make_cohort, tmp_path, layout):
+    pytest.importorskip("pyarrow")
+    (a_ind, a_eggs), (b_ind, b_eggs) = make_cohort(), make_cohort(treatment="B", seed=1)
+    ind, eggs = pd.concat([a_ind, b_ind]), pd.concat([a_eggs, b_eggs])
+    if layout == "pair":
+        ind.to_parquet(tmp_path / "individuals", partition_cols=["Treatment"])
+        eggs.to_parquet(tmp_path / "eggs", partition_cols=["Treatment"]); src = tmp_path
+    else:
+        long = ind.merge(eggs, left_on=["Treatment", "ID"], right_on=["Treatment", "FemaleID"], how="left")
+        long.drop(columns="FemaleID").to_parquet(tmp_path / "long", partition_cols=["Treatment"]); src = tmp_path / "long"
+    assert (tmp_path / "long" / "Treatment=A").is_dir() if layout == "long" else (tmp_path / "eggs" / "Treatment=A").is_dir()
+    df_ind, df_eggs = load_dataset(src)
+    assert df_ind["Treatment"].value_counts().to_dict() == {"A": len(a_ind), "B": len(b_ind)}
+    assert df_eggs.groupby("Treatment")["Eggs"].sum().astype(float).to_dict() == eggs.groupby("Treatment")["Eggs"].sum().to_dict()
+
+
+
+def test_ingest_cache_is_bounded(make_cohort, tmp_path, monkeypatch):
+    import data_io
+    monkeypatch.setattr(data_io, "CACHE_DIR", tmp_path / "cache")
+    def book(k):
+        ind, eggs = make_cohort(seed=k); path = tmp_path / f"book{k}.xlsx"
+        with pd.ExcelWriter(path, engine="xlsxwriter") as xw:
+            ind.to_excel(xw, sheet_name="individuals", index=False); eggs.to_excel(xw, sheet_name="eggs", index=False)
+        return path
+    for k in range(3): data_io.read_workbook(book(k))
+    ingest = tmp_path / "cache" / "ingest"
+    assert len(list(ingest.iterdir())) == 6   # individuals + eggs per workbook
+    monkeypatch.setattr(data_io, "INGEST_CACHE_MAX_BYTES", 0)
+    last = book(3); df_ind, _ = data_io.read_workbook(last)
+    assert sorted(f.name.split("_")[0] for f in ingest.iterdir()) == [data_io._cache_key(last)] * 2   # only the new entry is kept
+    assert data_io.read_workbook(last)[0].equals(df_ind)
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lifetable_core import _lifetable_for_treatment
+from stats_bootstrap import PARAMS, _cohort_arrays, _params_from_draws
+
+
+def _reference(ind, eggs, ind_idx, fem_idx, uniq):
+    "Re-analyse one resample the slow way: individuals by row, eggs by whole FemaleID cluster (or as-is)."
+    ind_r = ind.iloc[ind_idx].reset_index(drop=True)
+    eggs_r = eggs if fem_idx is None else pd.concat([eggs[eggs["FemaleID"] == uniq[j]] for j in fem_idx], ignore_index=True)
+    return _lifetable_for_treatment(ind_r, eggs_r)[0][PARAMS].to_numpy(dtype=float)[0]
+
+
+@pytest.mark.parametrize("female_ids", [True, False])
+def test_params_from_draws_matches_lifetable(make_cohort, female_ids):
+    ind, eggs = make_cohort(female_ids=female_ids)
+    c = _cohort_arrays(ind, eggs)
+    assert c.resample_eggs is female_ids
+    rng = np.random.default_rng(7); B = 12; n, g = len(ind), c.eggs.shape[0]
+    ind_idx = rng.integers(0, n, (B, n))
+    fem_idx = rng.integers(0, g, (B, g)) if female_ids else None
+    got = _params_from_draws(c, ind_idx, fem_idx)
+    uniq = np.sort(eggs["FemaleID"].dropna().unique()) if female_ids else None
+    for b in range(B):
+        want = _reference(ind, eggs, ind_idx[b], None if fem_idx is None else fem_idx[b], uniq)
+        np.testing.assert_allclose(got[b], want, rtol=1e-9, atol=1e-12, equal_nan=True)
+
+
+def test_no_female_ids_copies_eggs(make_cohort):
+    "Without FemaleID every replicate sees the full egg table (one summed group, not resampled)."
+    ind, eggs = make_cohort(female_ids=False)
+    c = _cohort_arrays(ind, eggs)
+    assert not c.resample_eggs and c.eggs.shape[0] == 1
+    assert c.eggs.sum() == pytest.approx(eggs["Eggs"].sum())
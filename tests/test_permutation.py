@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lifetable_core import _lifetable_for_treatment
+from stats_bootstrap import PARAMS, _cohort_arrays, _params_from_draws, _pool_pair, permutation_test
+
+
+def _clusters(eggs):
+    return [eggs[eggs["FemaleID"] == f] for f in np.sort(eggs["FemaleID"].unique())]
+
+
+@pytest.mark.parametrize("female_ids", [True, False])
+def test_permutation_matches_reanalysis(make_cohort, female_ids):
+    "A pooled-label permutation gives what re-analysing the relabelled frames gives."
+    (ia, ea), (ib, eb) = make_cohort(30, 1, female_ids, "A"), make_cohort(25, 2, female_ids, "B", fecundity=8.0)
+    cA, cB, nA, gA, perm_eggs = _pool_pair(_cohort_arrays(ia, ea), _cohort_arrays(ib, eb))
+    assert perm_eggs is female_ids
+    rng = np.random.default_rng(3); P = rng.permutation(len(ia) + len(ib))[None, :]
+    F = rng.permutation(cA.eggs.shape[0])[None, :] if perm_eggs else None
+    pa = _params_from_draws(cA, P[:, :nA], None if F is None else F[:, :gA])[0]
+    pb = _params_from_draws(cB, P[:, nA:], None if F is None else F[:, gA:])[0]
+
+    ind = pd.concat([ia, ib], ignore_index=True)
+    if female_ids:
+        cl = _clusters(ea) + _clusters(eb)
+        eggs_a = pd.concat([cl[j] for j in F[0, :gA]]); eggs_b = pd.concat([cl[j] for j in F[0, gA:]])
+    else:   # no clusters: each side keeps its own eggs
+        eggs_a, eggs_b = ea, eb
+    for got, idx, eggs in ((pa, P[0, :nA], eggs_a), (pb, P[0, nA:], eggs_b)):
+        want = _lifetable_for_treatment(ind.iloc[idx], eggs)[0][PARAMS].to_numpy(dtype=float)[0]
+        np.testing.assert_allclose(got, want, rtol=1e-9, atol=1e-12, equal_nan=True)
+
+
+
+def test_pairs_without_female_ids_are_flagged(make_cohort):
+    parts = [make_cohort(30, 1, True, "A"), make_cohort(25, 2, True, "B", fecundity=8.0), make_cohort(20, 3, False, "C")]
+    ind = pd.concat([p[0] for p in parts], ignore_index=True); eggs = pd.concat([p[1] for p in parts], ignore_index=True)
+    res = permutation_test(ind, eggs, n_perm=200, random_state=0)
+    flags = {(a, b): f for a, b, f in res[["A", "B", "eggs_permuted"]].itertuples(index=False)}
+    assert flags == {("A", "B"): True, ("A", "C"): False, ("B", "C"): False}
+    assert res["p_perm"].notna().all()